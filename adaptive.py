@@ -0,0 +1,59 @@
+import numpy as np
+
+from geometry import densify, cumulative_distance
+
+# Fuel estimates of the adaptive mode stay within this relative tolerance of the uniform 0.1 km mode
+# (checked by tests/unit/test_adaptive.py and reported by benchmarks/bench_adaptive.py)
+FUEL_TOLERANCE = 0.005
+
+
+# Coarse-to-fine elevation profile of a route.
+# 1. The route is densified at `fine_spacing` as usual, but only every `coarse_step`-th point
+#    (plus the last one) is sent to `get_elevations` first.
+# 2. Where a coarse sample differs from the straight line between its neighbours by more than
+#    `threshold` meters, the terrain is not a constant grade there, and the two coarse segments
+#    around it are refined: their fine points are fetched too.
+# 3. Flat or constant-grade stretches keep only the coarse samples. Segment distances are measured
+#    along the fine polyline, so the route distance is the same as in the uniform mode.
+# `get_elevations` is an async callable taking a list of (lon, lat) points, like fetch_elevations.
+async def adaptive_profile(route, get_elevations, fine_spacing=0.1, coarse_step=10, threshold=5.0):
+    fine = densify(route, fine_spacing)
+    cumulative = cumulative_distance(fine)
+    num_points = len(fine)
+
+    coarse_index = np.unique(np.append(np.arange(0, num_points, coarse_step), num_points - 1))
+    coarse_heights = np.asarray(await get_elevations(fine[coarse_index].tolist()), dtype=np.float64)
+
+    # Deviation of every inner coarse sample from the line through its neighbours
+    position = cumulative[coarse_index]
+    weight = np.zeros(len(coarse_index) - 2)
+    span = position[2:] - position[:-2]
+    np.divide(position[1:-1] - position[:-2], span, out=weight, where=span > 0)
+    predicted = coarse_heights[:-2] + (coarse_heights[2:] - coarse_heights[:-2]) * weight
+    bumpy = ~(np.abs(coarse_heights[1:-1] - predicted) <= threshold)  # NaN (missing data) is refined too
+
+    refine = np.zeros(len(coarse_index) - 1, dtype=bool)
+    refine[:-1] |= bumpy
+    refine[1:] |= bumpy
+
+    # Coarse segment of every fine point, the fine points inside refined segments are fetched as well
+    segment = np.searchsorted(coarse_index, np.arange(num_points), side="right") - 1
+    is_coarse = np.zeros(num_points, dtype=bool)
+    is_coarse[coarse_index] = True
+    refined = ~is_coarse & refine[np.minimum(segment, len(refine) - 1)]
+
+    heights = np.full(num_points, np.nan)
+    heights[coarse_index] = coarse_heights
+    refined_index = np.flatnonzero(refined)
+    if len(refined_index):
+        heights[refined_index] = np.asarray(await get_elevations(fine[refined_index].tolist()), dtype=np.float64)
+
+    kept = np.flatnonzero(is_coarse | refined)
+    return {
+        "points": fine[kept],
+        "elevations": heights[kept],
+        "segment_distances": np.diff(cumulative[kept]),
+        "fine_points": num_points,
+        "coarse_points": len(coarse_index),
+        "refined_points": len(refined_index),
+    }
@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import csv
+import json
+import re
+import time
+from pathlib import Path
+
+from client import HttpClient
+from elevation import OpenTopoDataProvider, PUBLIC_API_RATE
+from elevation_cache import ElevationCache
+from route_cache import RouteCache
+from geometry import simplify
+from profiles import ProfileStore
+from route_file import save_quote
+from spatial_index import SpatialElevationIndex
+from visualization import visualize_routes, MAP_TOLERANCE_M
+from workers import RouteProcessPool
+from main import quote_lane, quote_summary, BASE_FUEL_CONSUMPTION, FUEL_COST_PER_GALLON
+
+
+# Read origin/destination pairs (ZIP codes or 'latitude,longitude') from a CSV file with
+# `origin,destination` columns, or from a JSONL file with the same keys
+def read_lanes(path):
+    path = Path(path)
+    with path.open(newline="") as file:
+        if path.suffix in (".jsonl", ".json"):
+            rows = [json.loads(line) for line in file if line.strip()]
+        else:
+            rows = list(csv.DictReader(file))
+    return [(str(row["origin"]).strip(), str(row["destination"]).strip()) for row in rows]
+
+
+# File name of the route file of a lane: '41.878113,-87.629799' -> '41.878113_-87.629799'
+def route_file_name(origin, destination):
+    return re.sub(r"[^0-9A-Za-z.-]", "_", f"{origin}__{destination}") + ".route"
+
+
+# Quote one lane and reduce the result to the fields written to the output file.
+# With a `map_routes` list the simplified route is kept there for the map of the run,
+# with a ProfileStore the terrain profile of the lane is saved for re-pricing, with `routes_dir`
+# the densified route and its elevations are saved as a route file (see route_file.py).
+async def quote_one(origin, destination, semaphore, map_routes=None, profiles=None, routes_dir=None,
+                    **quote_options):
+    async with semaphore:
+        try:
+            quote = await quote_lane(origin, destination, **quote_options)
+        except Exception as error:
+            return {"origin": origin, "destination": destination, "error": repr(error)}
+
+    if quote is None:
+        return {"origin": origin, "destination": destination, "error": "Failed to get the route"}
+    if profiles is not None:
+        profiles.put_quote(origin, destination, quote)
+    if routes_dir is not None:
+        save_quote(Path(routes_dir) / route_file_name(origin, destination), quote,
+                   meta={"origin": origin, "destination": destination})
+    if map_routes is not None:
+        map_routes.append((f"{origin} -> {destination}", simplify(quote["detailed_route"], MAP_TOLERANCE_M)))
+    return {"origin": origin, "destination": destination, **quote_summary(quote)}
+
+
+# Quote all lanes concurrently (at most `parallelism` at a time) and write every result
+# as one JSON line as soon as it is ready. All lanes share one HTTP client and one elevation
+# provider, so the elevation rate limit applies to the whole run. With a workers.RouteProcessPool
+# the CPU-bound work of every lane runs in the worker processes instead of the event loop.
+async def quote_lanes(lanes, output, parallelism=8, client=None, provider=None, cache=None, route_cache=None,
+                      adaptive=False, base_fuel_consumption=BASE_FUEL_CONSUMPTION,
+                      fuel_cost_per_gallon=FUEL_COST_PER_GALLON, pool=None, map_routes=None, profiles=None,
+                      routes_dir=None, spatial_index=None):
+    semaphore = asyncio.Semaphore(parallelism)
+    quote_options = {
+        "client": client,
+        "provider": provider,
+        "cache": cache,
+        "route_cache": route_cache,
+        "adaptive": adaptive,
+        "base_fuel_consumption": base_fuel_consumption,
+        "fuel_cost_per_gallon": fuel_cost_per_gallon,
+        "pool": pool,
+        "spatial_index": spatial_index,
+    }
+    tasks = [quote_one(origin, destination, semaphore, map_routes, profiles, routes_dir, **quote_options)
+             for origin, destination in lanes]
+
+    start_time = time.perf_counter()
+    failed = 0
+    for task in asyncio.as_completed(tasks):
+        result = await task
+        failed += "error" in result
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "lanes": len(lanes),
+        "failed": failed,
+        "seconds": elapsed,
+        "lanes_per_second": len(lanes) / elapsed if elapsed > 0 else 0,
+    }
+
+
+async def run_batch(args):
+    lanes = read_lanes(args.lanes)
+    cache = ElevationCache(args.cache) if args.cache else None
+    route_cache = RouteCache(args.route_cache) if args.route_cache else None
+    pool = RouteProcessPool(args.processes) if args.processes else None
+    map_routes = [] if args.map else None
+    profiles = ProfileStore(args.profiles) if args.profiles else None
+    if args.routes_dir:
+        Path(args.routes_dir).mkdir(parents=True, exist_ok=True)
+    spatial_index = None
+    if args.reuse_radius > 0:
+        spatial_index = (SpatialElevationIndex.from_cache(cache, args.reuse_radius) if cache is not None
+                         else SpatialElevationIndex(args.reuse_radius))
+    async with HttpClient() as client:
+        provider = OpenTopoDataProvider(requests_per_second=args.requests_per_second, client=client,
+                                        checkpoint=cache)
+        with open(args.output, "w") as output:
+            summary = await quote_lanes(lanes, output, parallelism=args.parallelism, client=client,
+                                        provider=provider, cache=cache, route_cache=route_cache,
+                                        adaptive=args.adaptive,
+                                        base_fuel_consumption=args.base_fuel_consumption,
+                                        fuel_cost_per_gallon=args.fuel_price, pool=pool,
+                                        map_routes=map_routes, profiles=profiles, routes_dir=args.routes_dir,
+                                        spatial_index=spatial_index)
+    if pool is not None:
+        pool.close()
+    if profiles is not None:
+        profiles.close()
+    if spatial_index is not None:
+        print(f"Nearby elevation reuse: {spatial_index.stats()}")
+    if cache is not None or spatial_index is not None:
+        print(f"Elevation reuse across the lanes: {reuse_rate(cache, spatial_index):.1f}% of the points not fetched")
+    if cache is not None:
+        print(f"Elevation cache: {cache.stats()}")
+        cache.close()
+    if route_cache is not None:
+        print(f"Route cache: {route_cache.stats()}")
+        route_cache.close()
+    if map_routes:
+        labels, routes = zip(*map_routes)
+        visualize_routes(routes, args.map, labels=labels)
+    print(f"Quoted {summary['lanes']} lanes ({summary['failed']} failed) in {summary['seconds']:.2f} s, "
+          f"{summary['lanes_per_second']:.2f} lanes/sec")
+
+
+# Share of the route points of a run answered by the elevation cache or by a nearby known sample
+def reuse_rate(cache=None, spatial_index=None):
+    if cache is not None:
+        requested = cache.hits + cache.misses
+        fetched = spatial_index.misses if spatial_index is not None else cache.misses
+    elif spatial_index is not None:
+        requested = spatial_index.hits + spatial_index.misses
+        fetched = spatial_index.misses
+    else:
+        return 0.0
+    return (requested - fetched) / requested * 100 if requested else 0.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Quote a list of lanes (CSV or JSONL with origin,destination)")
+    parser.add_argument("lanes", help="CSV or JSONL file with origin and destination columns")
+    parser.add_argument("output", help="JSONL file for the results")
+    parser.add_argument("--parallelism", type=int, default=8, help="Lanes quoted at the same time")
+    parser.add_argument("--requests-per-second", type=float, default=PUBLIC_API_RATE,
+                        help="Elevation API budget shared by all lanes")
+    parser.add_argument("--cache", default="elevation_cache.sqlite", help="Elevation cache file, '' to disable")
+    parser.add_argument("--route-cache", default="route_cache.sqlite", help="Route cache file, '' to disable")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Sample flat stretches coarsely, refine only where the terrain changes")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="Worker processes for the CPU-bound work of the lanes, 0 = in the event loop")
+    parser.add_argument("--map", help="HTML file for a map of all quoted routes")
+    parser.add_argument("--reuse-radius", type=float, default=0,
+                        help="Reuse the elevation of a known point within this many meters (e.g. 30), 0 = off")
+    parser.add_argument("--profiles", help="Terrain profile store (see profiles.py) to save every lane to")
+    parser.add_argument("--routes-dir", help="Directory to save the route file (see route_file.py) of every lane to")
+    parser.add_argument("--base-fuel-consumption", type=float, default=BASE_FUEL_CONSUMPTION,
+                        help="Gallons per 100 miles")
+    parser.add_argument("--fuel-price", type=float, default=FUEL_COST_PER_GALLON, help="Price per gallon in $")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.run(run_batch(parse_args()))
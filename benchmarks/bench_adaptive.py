@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adaptive import adaptive_profile, FUEL_TOLERANCE
+from fuel import calculate_fuel_profile
+from geometry import densify, segment_distances
+
+BASE_FUEL_CONSUMPTION = 5.75
+
+# LA -> Denver as a few straight OSRM-like legs
+ROUTE = np.array([[-118.24, 34.05], [-116.0, 35.2], [-112.5, 37.0], [-108.6, 39.1], [-104.98, 39.74]])
+
+
+# Synthetic terrain: plains with a slight grade, a mountain range around lon -107, rolling hills
+# and a few meters of small-scale roughness everywhere
+def terrain(points):
+    lon, lat = points[:, 0], points[:, 1]
+    plains = 500 + 40 * (lon + 118)
+    mountains = 1500 * np.exp(-((lon + 107) / 0.8) ** 2) * (1 + 0.3 * np.sin(lat * 40))
+    hills = 30 * np.sin(lon * 25) * (lon > -116) * (lon < -113)
+    roughness = 3 * np.sin(lon * 400) * np.sin(lat * 300)
+    return plains + mountains + hills + roughness
+
+
+async def get_elevations(points):
+    return terrain(np.asarray(points)).tolist()
+
+
+async def main():
+    fine = densify(ROUTE)
+    start_time = time.perf_counter()
+    fine_fuel, _ = calculate_fuel_profile(terrain(fine), segment_distances(fine), BASE_FUEL_CONSUMPTION)
+    fine_time = time.perf_counter() - start_time
+    print(f"uniform 0.1 km: {len(fine)} elevation lookups, fuel {fine_fuel:.3f} gal, {fine_time * 1000:.1f} ms")
+
+    for coarse_step, threshold in [(10, 1.0), (10, 2.0), (10, 5.0), (10, 10.0), (20, 5.0)]:
+        start_time = time.perf_counter()
+        profile = await adaptive_profile(ROUTE, get_elevations, coarse_step=coarse_step, threshold=threshold)
+        fuel, _ = calculate_fuel_profile(profile["elevations"], profile["segment_distances"], BASE_FUEL_CONSUMPTION)
+        elapsed = time.perf_counter() - start_time
+        error = (fuel - fine_fuel) / fine_fuel
+        status = "ok" if abs(error) <= FUEL_TOLERANCE else "OUT OF TOLERANCE"
+        print(f"adaptive step={coarse_step} threshold={threshold} m: {len(profile['points'])} elevation lookups "
+              f"({len(profile['points']) / len(fine) * 100:.1f}%), fuel {fuel:.3f} gal, error {error * 100:+.3f}% "
+              f"[{status}], {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
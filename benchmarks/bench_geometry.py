@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import interpolate_points_distance_based, get_route_distance
+from geometry import route_to_array, densify, route_distance
+
+
+# Synthetic coast-to-coast route: ~4500 km of OSRM-like vertices between LA and NY
+def make_route(num_points=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    lon = np.linspace(-118.242766, -74.005974, num_points)
+    lat = np.linspace(34.053691, 40.712776, num_points) + rng.normal(0, 0.002, num_points)
+    return np.column_stack((lon, lat)).tolist()
+
+
+# Best of several runs, in seconds
+def best_time(func, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def main():
+    route = make_route()
+    detailed_route = interpolate_points_distance_based(route)
+    detailed_coords = densify(route_to_array(route))
+    print(f"Route points: {len(route)}, densified points: {len(detailed_route)}")
+
+    loop_densify = best_time(interpolate_points_distance_based, route)
+    numpy_densify = best_time(lambda r: densify(route_to_array(r)), route)
+    loop_distance = best_time(get_route_distance, detailed_route)
+    numpy_distance = best_time(route_distance, detailed_coords)
+
+    print(f"densify:  loop {loop_densify * 1000:.2f} ms, numpy {numpy_densify * 1000:.2f} ms, "
+          f"speedup x{loop_densify / numpy_densify:.1f}")
+    print(f"distance: loop {loop_distance * 1000:.2f} ms, numpy {numpy_distance * 1000:.2f} ms, "
+          f"speedup x{loop_distance / numpy_distance:.1f}")
+
+
+if __name__ == '__main__':
+    main()
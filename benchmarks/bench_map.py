@@ -0,0 +1,43 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import LANES, load_fixture
+from geometry import densify, simplify
+from visualization import visualize_routes, MAP_TOLERANCE_M
+
+
+# Time to build and write the map of `routes`, and the size of the HTML file
+def render(routes, labels, tolerance_m):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "map.html")
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            visualize_routes(routes, path, labels=labels, tolerance_m=tolerance_m)
+        return time.perf_counter() - start_time, os.path.getsize(path)
+
+
+def main():
+    labels, routes = [], []
+    for lane in LANES:
+        osrm_body, _ = load_fixture(lane)
+        labels.append(lane)
+        routes.append(densify(json.loads(osrm_body)["routes"][0]["geometry"]["coordinates"]))
+    render(routes[:1], labels[:1], MAP_TOLERANCE_M)  # Import folium first
+
+    print(f"{'tolerance':<12}{'points':>10}{'write':>12}{'HTML size':>14}")
+    for tolerance_m in (None, 1.0, MAP_TOLERANCE_M, 50.0):
+        points = sum(len(route) if tolerance_m is None else len(simplify(route, tolerance_m)) for route in routes)
+        seconds, size = render(routes, labels, tolerance_m)
+        name = "full" if tolerance_m is None else f"{tolerance_m:g} m"
+        print(f"{name:<12}{points:>10}{seconds * 1000:>9.0f} ms{size / 2 ** 20:>11.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
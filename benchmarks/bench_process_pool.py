@@ -0,0 +1,57 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import LANES, load_fixture
+from run_benchmarks import ReplayProvider
+from main import quote_route
+from workers import RouteProcessPool
+
+
+# Worst delay of a 1 ms ticker while the quotes run: how long the event loop (and so the network I/O) was blocked
+async def max_loop_lag(done):
+    lag = 0.0
+    while not done.is_set():
+        start_time = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lag = max(lag, time.perf_counter() - start_time - 0.001)
+    return lag
+
+
+# Price every recorded lane `copies` times concurrently: (lanes per second, max event loop lag in seconds)
+async def run(routes, pool):
+    done = asyncio.Event()
+    lag = asyncio.ensure_future(max_loop_lag(done))
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(quote_route(route, provider=provider, pool=pool) for route, provider in routes))
+    elapsed = time.perf_counter() - start_time
+    done.set()
+    return len(routes) / elapsed, await lag
+
+
+def main(copies=4):
+    routes = []
+    for lane in LANES:
+        osrm_body, elevations = load_fixture(lane)
+        route = json.loads(osrm_body)["routes"][0]["geometry"]["coordinates"]
+        routes.extend([(route, ReplayProvider(elevations))] * copies)
+    print(f"{len(routes)} routes, {os.cpu_count()} CPUs")
+
+    throughput, lag = asyncio.run(run(routes, None))
+    print(f"{'event loop':<28}{throughput:>8.1f} routes/sec, max loop lag {lag * 1000:>7.1f} ms")
+    for processes in sorted({1, 2, os.cpu_count() or 1}):
+        with RouteProcessPool(processes) as pool:
+            asyncio.run(run(routes[:processes], pool))  # Start the workers
+            throughput, lag = asyncio.run(run(routes, pool))
+        print(f"{f'{processes} worker processes':<28}{throughput:>8.1f} routes/sec, max loop lag {lag * 1000:>7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
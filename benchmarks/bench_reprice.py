@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import LANES, load_fixture
+from fuel import terrain_factors
+from geometry import densify, segment_distances
+from profiles import ProfileStore
+
+
+# Lane book of `copies` x the recorded lanes: time to load the stored profiles and to re-price all lanes
+def main(copies=200):
+    profiles = []
+    for lane in LANES:
+        osrm_body, elevations = load_fixture(lane)
+        distances = segment_distances(densify(json.loads(osrm_body)["routes"][0]["geometry"]["coordinates"]))
+        profiles.append((lane, distances, terrain_factors(elevations, distances)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "profiles.sqlite")
+        store = ProfileStore(path)
+        for i in range(copies):
+            for lane, distances, factors in profiles:
+                store.put(lane, str(i), distances, factors)
+        size = os.path.getsize(path)
+
+        start_time = time.perf_counter()
+        book = store.load_book()
+        loaded = time.perf_counter()
+        for fuel_price in (3.25, 3.50, 3.75, 4.00):
+            book.reprice(fuel_cost_per_gallon=fuel_price)
+        priced = (time.perf_counter() - loaded) / 4
+        store.close()
+
+    print(f"{len(book)} lanes, {size / 2 ** 20:.1f} MB of profiles")
+    print(f"Load: {loaded - start_time:.3f} s, re-price: {priced * 1000:.3f} ms per fuel price")
+
+
+if __name__ == '__main__':
+    main()
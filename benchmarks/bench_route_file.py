@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import synthetic_terrain
+from geometry import densify
+from route_file import RouteFile, save_route
+
+
+# Best of several runs, in seconds
+def best_time(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+# Python objects allocated while building the result of `func`, in bytes
+def allocated(func):
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+# A ~50k point densified route: route file vs the JSON of the lists the pipeline builds
+def main():
+    lon = np.linspace(-118.242766, -74.005974, 1000)
+    lat = np.linspace(34.053691, 40.712776, 1000) + 0.3 * np.sin(lon)
+    coords = densify(np.column_stack((lon, lat)))
+    elevations = synthetic_terrain(coords)
+    detailed_route, elevation_list = [tuple(point) for point in coords.tolist()], elevations.tolist()
+
+    with tempfile.TemporaryDirectory() as directory:
+        route_path = os.path.join(directory, "lane.route")
+        json_path = os.path.join(directory, "lane.json")
+        save_route(route_path, coords, elevations)
+        with open(json_path, "w") as file:
+            json.dump({"route": detailed_route, "elevations": elevation_list}, file)
+
+        def load_json():
+            with open(json_path) as file:
+                return json.load(file)
+
+        print(f"{len(coords)} points")
+        print(f"{'':<14}{'file':>10}{'load':>12}{'in memory':>12}")
+        print(f"{'JSON lists':<14}{os.path.getsize(json_path) / 2 ** 20:>7.2f} MB{best_time(load_json) * 1000:>9.2f} ms"
+              f"{allocated(load_json) / 2 ** 20:>9.2f} MB")
+        print(f"{'route file':<14}{os.path.getsize(route_path) / 2 ** 20:>7.2f} MB"
+              f"{best_time(lambda: RouteFile(route_path)) * 1000:>9.2f} ms"
+              f"{allocated(lambda: RouteFile(route_path)) / 2 ** 20:>9.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
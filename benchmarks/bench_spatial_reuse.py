@@ -0,0 +1,69 @@
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevation import ElevationProvider
+from fixtures import load_fixture, synthetic_terrain
+from geometry import densify
+from main import fetch_elevations
+from spatial_index import SpatialElevationIndex
+
+
+class TerrainProvider(ElevationProvider):
+    def __init__(self):
+        self.points = 0
+
+    async def get_elevations(self, coordinates):
+        self.points += len(coordinates)
+        return synthetic_terrain(np.asarray(coordinates)).tolist()
+
+
+# Lane book sharing one corridor (the recorded Denver - Naples route): lanes covering different
+# stretches of it. Like OSRM routes from other origins, every lane has its own subset of the
+# corridor vertices and a few meters of offset, so its densified points differ from the others'.
+def lane_book(num_lanes=20, seed=0):
+    osrm_body, _ = load_fixture("denver_naples")
+    corridor = np.array(json.loads(osrm_body)["routes"][0]["geometry"]["coordinates"])
+    rng = np.random.default_rng(seed)
+    lanes = []
+    for _ in range(num_lanes):
+        start = rng.integers(0, len(corridor) - 1000)
+        end = start + rng.integers(500, len(corridor) - start)
+        vertices = corridor[start:end]
+        keep = rng.uniform(size=len(vertices)) < 0.7
+        keep[[0, -1]] = True
+        lanes.append(vertices[keep] + rng.normal(0, 3 / 111_320, size=2))
+    return lanes
+
+
+async def run(lanes, radius_m):
+    provider = TerrainProvider()
+    index = SpatialElevationIndex(radius_m) if radius_m else None
+    requested, errors = 0, []
+    for lane in lanes:
+        points = densify(lane)
+        elevations = np.array(await fetch_elevations(points.tolist(), provider=provider, spatial_index=index),
+                              dtype=np.float64)
+        requested += len(points)
+        errors.append(np.abs(elevations - synthetic_terrain(points)))
+    errors = np.concatenate(errors)
+    return requested, provider.points, errors
+
+
+def main():
+    lanes = lane_book()
+    print(f"{len(lanes)} lanes along one corridor")
+    print(f"{'radius':<10}{'points':>10}{'fetched':>10}{'reused':>9}{'mean error':>12}{'max error':>11}")
+    for radius_m in (0, 10, 30, 60):
+        requested, fetched, errors = asyncio.run(run(lanes, radius_m))
+        print(f"{f'{radius_m} m' if radius_m else 'off':<10}{requested:>10}{fetched:>10}"
+              f"{(requested - fetched) / requested * 100:>8.1f}%{errors.mean():>10.2f} m{errors.max():>9.2f} m")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold start of a fresh interpreter importing the quoting pipeline, with the visualization layer left
+# lazy (what every CLI run, batch worker and test process pays now) and imported eagerly as main.py used to
+COMMANDS = {
+    "import main (lazy viz)": "import main",
+    "import main + folium + pyplot (eager viz)": "import main, folium, matplotlib.pyplot",
+    "python main.py --help": None,
+}
+
+
+# Median wall time of a fresh interpreter running `code`, in seconds
+def cold_start(code, repeat):
+    args = [sys.executable, "main.py", "--help"] if code is None else [sys.executable, "-c", code]
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+def main(repeat=7):
+    # Warm the OS file cache and the bytecode caches first
+    for code in COMMANDS.values():
+        cold_start(code, 1)
+
+    results = {name: cold_start(code, repeat) for name, code in COMMANDS.items()}
+    for name, seconds in results.items():
+        print(f"{name:<45}{seconds * 1000:>9.1f} ms")
+    lazy, eager = results["import main (lazy viz)"], results["import main + folium + pyplot (eager viz)"]
+    print(f"Cold start saved by lazy visualization: {(eager - lazy) * 1000:.1f} ms ({eager / lazy:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
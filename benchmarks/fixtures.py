@@ -0,0 +1,121 @@
+import asyncio
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry import densify, haversine_np
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Lanes replayed by the benchmarks (the sample lanes listed in main.run_quote)
+LANES = {
+    "la_denver": ("34.053691,-118.242766", "39.739236,-104.984862"),
+    "chicago_ny": ("41.878113,-87.629799", "40.712776,-74.005974"),
+    "chicago_houston": ("41.878113,-87.629799", "29.758938,-95.367697"),
+    "denver_el_paso": ("39.739236,-104.984862", "31.760116,-106.487040"),
+    "denver_naples": ("39.739236,-104.984862", "26.142198,-81.794294"),
+}
+
+
+# Recorded OSRM response body (gzipped JSON) and the elevations of its densified route
+def fixture_paths(lane):
+    return FIXTURES_DIR / f"{lane}.osrm.json.gz", FIXTURES_DIR / f"{lane}.elevations.npz"
+
+
+def save_fixture(lane, osrm_body, elevations):
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    osrm_path, elevations_path = fixture_paths(lane)
+    with gzip.open(osrm_path, "wb") as file:
+        file.write(osrm_body)
+    # Decimeters as int32 (NaN for missing heights becomes INT32_MIN) compress far better than floats
+    heights = np.asarray(elevations, dtype=np.float64)
+    decimeters = np.where(np.isnan(heights), np.iinfo(np.int32).min, np.round(heights * 10)).astype(np.int32)
+    np.savez_compressed(elevations_path, decimeters=decimeters)
+
+
+# (raw OSRM response body, elevations with NaN for missing heights)
+def load_fixture(lane):
+    osrm_path, elevations_path = fixture_paths(lane)
+    with gzip.open(osrm_path, "rb") as file:
+        osrm_body = file.read()
+    decimeters = np.load(elevations_path)["decimeters"]
+    elevations = np.where(decimeters == np.iinfo(np.int32).min, np.nan, decimeters / 10)
+    return osrm_body, elevations
+
+
+# Record a lane from the live OSRM and opentopodata APIs (takes minutes per lane on the public API)
+async def record_lane(lane):
+    from client import HttpClient
+    from elevation import OpenTopoDataProvider
+    import main
+
+    start, end = LANES[lane]
+    start_lat, start_lon = start.split(",")
+    end_lat, end_lon = end.split(",")
+    url = (f"{main.OSRM_URL}/route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}"
+           f"?overview=full&geometries=geojson")
+    async with HttpClient() as client:
+        async with client.session.get(url) as response:
+            osrm_body = await response.read()
+        route = json.loads(osrm_body)["routes"][0]["geometry"]["coordinates"]
+        provider = OpenTopoDataProvider(client=client)
+        elevations = await provider.get_elevations(densify(route).tolist())
+    save_fixture(lane, osrm_body, [np.nan if height is None else height for height in elevations])
+
+
+# Synthetic terrain: plains rising towards the Rockies, mountain ranges and rolling hills
+def synthetic_terrain(points):
+    lon, lat = points[:, 0], points[:, 1]
+    plains = 200 + 1400 / (1 + np.exp((lon + 100) * 1.5))
+    rockies = 1500 * np.exp(-((lon + 106.5) / 1.2) ** 2) * (1 + 0.3 * np.sin(lat * 40) * np.cos(lon * 30))
+    appalachians = 500 * np.exp(-((lon + 79) / 1.5) ** 2) * (lat > 35)
+    hills = 15 * np.sin(lon * 60) * np.sin(lat * 45)
+    return plains + rockies + appalachians + hills
+
+
+# Offline stand-in for a recording: an OSRM-like geometry meandering around the great circle with
+# irregular vertex spacing (~0.5 km), and elevations of its densified route from synthetic_terrain
+def synthesize_lane(lane, seed=0):
+    start, end = (np.array([float(value) for value in point.split(",")][::-1]) for point in LANES[lane])
+    rng = np.random.default_rng(seed)
+    length_km = float(haversine_np(start[1], start[0], end[1], end[0])) * 1.2
+    num_vertices = int(length_km / 0.5)
+
+    fraction = np.sort(rng.uniform(0, 1, num_vertices))
+    fraction[0], fraction[-1] = 0, 1
+    direction = end - start
+    normal = np.array([-direction[1], direction[0]]) / np.linalg.norm(direction)
+    meander = (0.4 * np.sin(fraction * np.pi * 7) + 0.15 * np.sin(fraction * np.pi * 31)) * np.sin(fraction * np.pi)
+    route = start + fraction[:, None] * direction + meander[:, None] * normal
+    route = np.round(route, 6)
+
+    osrm_body = json.dumps({
+        "code": "Ok",
+        "routes": [{"geometry": {"coordinates": route.tolist(), "type": "LineString"},
+                    "distance": length_km * 1000, "legs": [{"summary": "synthetic"}]}],
+        "waypoints": [{"location": route[0].tolist()}, {"location": route[-1].tolist()}],
+    }).encode()
+    save_fixture(lane, osrm_body, synthetic_terrain(densify(route)))
+
+
+if __name__ == '__main__':
+    # python benchmarks/fixtures.py synthesize|record [lane ...]
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    lanes = sys.argv[2:] or list(LANES)
+    if command == "synthesize":
+        for lane in lanes:
+            synthesize_lane(lane)
+            print(f"Synthesized {lane}")
+    elif command == "record":
+        for lane in lanes:
+            asyncio.run(record_lane(lane))
+            print(f"Recorded {lane}")
+    else:
+        print("Usage: python benchmarks/fixtures.py synthesize|record [lane ...]")
+        sys.exit(1)
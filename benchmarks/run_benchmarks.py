@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevation import ElevationProvider
+from fixtures import LANES, load_fixture
+from fuel import calculate_fuel_profile
+from geometry import route_to_array, densify, segment_distances
+from main import quote_route, BASE_FUEL_CONSUMPTION
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+TIME_METRICS = ("densify_ms", "distance_ms", "fuel_ms", "pipeline_ms")
+
+
+# Elevation provider replaying the recorded elevations of a lane
+class ReplayProvider(ElevationProvider):
+    def __init__(self, elevations):
+        self.elevations = [None if np.isnan(height) else float(height) for height in elevations]
+
+    async def get_elevations(self, coordinates):
+        if len(coordinates) != len(self.elevations):
+            raise ValueError(f"Recorded {len(self.elevations)} elevations, {len(coordinates)} requested")
+        return self.elevations
+
+
+# Median duration of `func` in milliseconds
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings)
+
+
+# Fixed workload (Python loop + NumPy) used to scale timings between machines
+def calibrate(repeat=5):
+    values = np.random.default_rng(0).uniform(0, 1, 200_000)
+
+    def workload():
+        total = 0.0
+        for value in values[:50_000].tolist():
+            total += value * value
+        np.sort(values)
+        return total
+
+    return measure(workload, repeat)
+
+
+# Densify, distance, fuel and full-pipeline latency of one recorded lane, and the memory peak of the pipeline
+def bench_lane(lane, repeat):
+    osrm_body, elevations = load_fixture(lane)
+    coords = route_to_array(json.loads(osrm_body)["routes"][0]["geometry"]["coordinates"])
+    detailed = densify(coords)
+    distances = segment_distances(detailed)
+    provider = ReplayProvider(elevations)
+    loop = asyncio.new_event_loop()
+
+    # Full pipeline: decode the OSRM response, then densify -> distance -> elevations -> fuel -> price
+    def pipeline():
+        route = json.loads(osrm_body)["routes"][0]["geometry"]["coordinates"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            return loop.run_until_complete(quote_route(route, provider=provider))
+
+    try:
+        results = {
+            "points": len(detailed),
+            "densify_ms": measure(lambda: densify(coords), repeat),
+            "distance_ms": measure(lambda: segment_distances(detailed), repeat),
+            "fuel_ms": measure(lambda: calculate_fuel_profile(elevations, distances, BASE_FUEL_CONSUMPTION), repeat),
+            "pipeline_ms": measure(pipeline, repeat),
+        }
+        tracemalloc.start()
+        pipeline()
+        results["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    finally:
+        loop.close()
+    return results
+
+
+# Regressions against the baseline: timings are scaled by the calibration ratio of the two machines
+def compare(current, baseline, time_tolerance, memory_tolerance):
+    scale = baseline["calibration_ms"] / current["calibration_ms"]
+    regressions = []
+    for lane, results in current["lanes"].items():
+        expected = baseline["lanes"].get(lane)
+        if expected is None:
+            continue
+        for metric in TIME_METRICS:
+            scaled = results[metric] * scale
+            if scaled > expected[metric] * (1 + time_tolerance):
+                regressions.append(f"{lane} {metric}: {scaled:.2f} ms (scaled) > baseline {expected[metric]:.2f} ms")
+        if results["peak_memory_mb"] > expected["peak_memory_mb"] * (1 + memory_tolerance):
+            regressions.append(f"{lane} peak_memory_mb: {results['peak_memory_mb']:.2f} MB "
+                               f"> baseline {expected['peak_memory_mb']:.2f} MB")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Quoting pipeline benchmarks on recorded lanes")
+    parser.add_argument("lanes", nargs="*", default=list(LANES), help="Lanes to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=7, help="Runs per measurement, the median is kept")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Save the results to {BASELINE_PATH.name}")
+    parser.add_argument("--check", action="store_true", help="Exit with an error on regressions against the baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed slowdown, 0.5 = +50%%")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="Allowed memory growth, 0.2 = +20%%")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    current = {"calibration_ms": calibrate(), "lanes": {}}
+    print(f"Calibration: {current['calibration_ms']:.2f} ms")
+    print(f"{'lane':<16}{'points':>8}{'densify':>10}{'distance':>10}{'fuel':>10}{'pipeline':>10}{'peak MB':>10}")
+    for lane in args.lanes:
+        results = current["lanes"][lane] = bench_lane(lane, args.repeat)
+        print(f"{lane:<16}{results['points']:>8}{results['densify_ms']:>10.2f}{results['distance_ms']:>10.2f}"
+              f"{results['fuel_ms']:>10.2f}{results['pipeline_ms']:>10.2f}{results['peak_memory_mb']:>10.2f}")
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Baseline saved to '{BASELINE_PATH}'")
+
+    if args.check:
+        regressions = compare(current, json.loads(BASELINE_PATH.read_text()), args.time_tolerance,
+                              args.memory_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
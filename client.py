@@ -0,0 +1,52 @@
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+
+# Long-lived HTTP client shared by the geocoding, routing and elevation calls.
+# One pooled session keeps connections (and TLS sessions) alive between requests,
+# so a batch of quotes does not pay for new handshakes to every service.
+class HttpClient:
+    def __init__(self, limit=100, limit_per_host=10, keepalive_timeout=30, dns_cache_ttl=300, timeout=30):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        self.session = None
+
+    # The session must be created inside a running event loop
+    async def start(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+# Session of the shared client, or a one-off session when no client is given
+@asynccontextmanager
+async def session_scope(client=None):
+    if client is not None:
+        await client.start()
+        yield client.session
+    else:
+        async with aiohttp.ClientSession() as session:
+            yield session
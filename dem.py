@@ -0,0 +1,92 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from elevation import ElevationProvider
+
+
+# One DEM tile: a 2D elevation grid whose node [row, col] lies at
+# lat = north - row * cell_size, lon = west + col * cell_size.
+# Missing data is stored as NaN (or as `nodata`).
+class DemTile:
+    def __init__(self, heights, west, north, cell_size, nodata=None):
+        self.heights = heights
+        self.west = west
+        self.north = north
+        self.cell_size = cell_size
+        self.nodata = nodata
+        rows, cols = heights.shape
+        self.east = west + (cols - 1) * cell_size
+        self.south = north - (rows - 1) * cell_size
+
+    # Load a tile saved by save_tile, the grid is memory-mapped instead of read into memory
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        meta = json.loads(path.with_suffix(".json").read_text())
+        heights = np.load(path.with_suffix(".npy"), mmap_mode="r")
+        return cls(heights, meta["west"], meta["north"], meta["cell_size"], meta.get("nodata"))
+
+    def contains(self, lon, lat):
+        return (lon >= self.west) & (lon <= self.east) & (lat >= self.south) & (lat <= self.north)
+
+    # Bilinear interpolation for arrays of points inside the tile, NaN where data is missing
+    def sample(self, lon, lat):
+        rows, cols = self.heights.shape
+        row = (self.north - lat) / self.cell_size
+        col = (lon - self.west) / self.cell_size
+        row0 = np.clip(np.floor(row).astype(np.int64), 0, max(rows - 2, 0))
+        col0 = np.clip(np.floor(col).astype(np.int64), 0, max(cols - 2, 0))
+        row1 = np.minimum(row0 + 1, rows - 1)
+        col1 = np.minimum(col0 + 1, cols - 1)
+        dy = row - row0
+        dx = col - col0
+
+        # Only the four neighbouring nodes of each point are read from the memory-mapped grid
+        corners = [np.asarray(self.heights[r, c], dtype=np.float64)
+                   for r, c in ((row0, col0), (row0, col1), (row1, col0), (row1, col1))]
+        if self.nodata is not None:
+            corners = [np.where(corner == self.nodata, np.nan, corner) for corner in corners]
+        top_left, top_right, bottom_left, bottom_right = corners
+
+        top = top_left * (1 - dx) + top_right * dx
+        bottom = bottom_left * (1 - dx) + bottom_right * dx
+        return top * (1 - dy) + bottom * dy
+
+
+# Save an elevation grid as a tile (<name>.npy with a <name>.json georeference).
+# GeoTIFF DEMs are converted once with this function, then loaded memory-mapped by DemTile.load
+def save_tile(path, heights, west, north, cell_size, nodata=None):
+    path = Path(path)
+    np.save(path.with_suffix(".npy"), np.asarray(heights))
+    meta = {"west": west, "north": north, "cell_size": cell_size, "nodata": nodata}
+    path.with_suffix(".json").write_text(json.dumps(meta))
+
+
+# Elevations sampled from local DEM tiles, vectorized over the whole route.
+# Points outside every tile (or on missing data) get None, like the HTTP API returns.
+class LocalDemProvider(ElevationProvider):
+    def __init__(self, tiles):
+        self.tiles = tiles
+
+    @classmethod
+    def from_directory(cls, directory):
+        return cls([DemTile.load(path) for path in sorted(Path(directory).glob("*.npy"))])
+
+    def sample(self, coordinates):
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        lon, lat = coords[:, 0], coords[:, 1]
+        elevations = np.full(len(coords), np.nan)
+        pending = np.ones(len(coords), dtype=bool)
+
+        for tile in self.tiles:
+            inside = pending & tile.contains(lon, lat)
+            if inside.any():
+                elevations[inside] = tile.sample(lon[inside], lat[inside])
+                pending &= ~inside
+        return elevations
+
+    async def get_elevations(self, coordinates):
+        elevations = self.sample(coordinates)
+        return [None if np.isnan(height) else float(height) for height in elevations]
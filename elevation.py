@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import aiohttp
+import numpy as np
+
+from client import session_scope
+from instrumentation import span
+
+ELEVATION_URL = "https://api.opentopodata.org/v1/ned10m"
+PUBLIC_API_RATE = 1 / 1.01  # The public API allows 1 request per second, keep the old 1.01 s spacing
+
+
+# Raised when the elevation API answers with a status worth retrying (429 or 5xx)
+class RetryableResponseError(Exception):
+    def __init__(self, status):
+        super().__init__(f"Elevation API responded with status {status}")
+        self.status = status
+
+
+# Raised when a response is not the expected JSON with one result per requested point: a shorter
+# list cannot be aligned with the batch, so the batch is fetched again instead
+class InvalidResponseError(Exception):
+    pass
+
+
+# Fetching elevations by coordinates
+async def get_elevations_batch(session, coordinates, url=ELEVATION_URL):
+    locations = "|".join([f"{lat},{lon}" for lon, lat in coordinates])
+    async with session.get(f"{url}?locations={locations}") as response:
+        if response.status == 429 or response.status >= 500:
+            raise RetryableResponseError(response.status)
+        try:
+            data = await response.json(content_type=None)
+        except ValueError as error:
+            raise InvalidResponseError(f"Elevation API responded with invalid JSON: {error}") from error
+        results = data.get('results') if isinstance(data, dict) else None
+        if not isinstance(results, list) or len(results) != len(coordinates):
+            raise InvalidResponseError(f"Elevation API responded without {len(coordinates)} results: {data!r:.200}")
+        return [result.get('elevation') for result in results]
+
+
+# Token bucket: allows `rate` requests per second on average, with bursts up to `capacity`
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                # Wait exactly until the next token is available
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Keeps several elevation batches in flight, limited both by requests per second and by
+# the number of simultaneous requests. A self-hosted opentopodata instance can be given
+# a higher budget than the public API.
+# Batches that still fail after their retries are fetched again in up to `recovery_rounds` later
+# passes (after `recovery_delay` seconds), only those batches, so one bad batch does not cost the
+# whole fetch. `on_batch(coordinates, heights)` is called for every batch as soon as it is fetched
+# (a checkpoint, e.g. into the ElevationCache).
+class ElevationScheduler:
+    def __init__(self, requests_per_second=PUBLIC_API_RATE, max_concurrency=4, max_retries=3, backoff=0.5,
+                 url=ELEVATION_URL, recovery_rounds=1, recovery_delay=5.0):
+        self.bucket = TokenBucket(requests_per_second)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.url = url
+        self.recovery_rounds = recovery_rounds
+        self.recovery_delay = recovery_delay
+
+    async def fetch_batch(self, session, semaphore, batch):
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.bucket.acquire()
+                try:
+                    with span("elevation_batch"):
+                        return await get_elevations_batch(session, batch, self.url)
+                except (RetryableResponseError, InvalidResponseError, aiohttp.ClientError,
+                        asyncio.TimeoutError) as error:
+                    if attempt == self.max_retries:
+                        print(f"Elevation batch failed after {attempt + 1} attempts: {error}")
+                        return None
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    # Returns the elevations in the same order as the coordinates, None for the points of batches
+    # that could not be fetched at all
+    async def fetch(self, session, coordinates, batch_size=100, on_batch=None):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        batches = [coordinates[i:i + batch_size] for i in range(0, len(coordinates), batch_size)]
+        results = [None] * len(batches)
+
+        async def fetch_and_checkpoint(index):
+            heights = await self.fetch_batch(session, semaphore, batches[index])
+            if heights is not None:
+                results[index] = heights
+                if on_batch is not None:
+                    on_batch(batches[index], heights)
+
+        pending = list(range(len(batches)))
+        for recovery_round in range(self.recovery_rounds + 1):
+            if recovery_round > 0:
+                print(f"Fetching {len(pending)} failed elevation batches again")
+                await asyncio.sleep(self.recovery_delay)
+            await asyncio.gather(*(fetch_and_checkpoint(index) for index in pending))
+            pending = [index for index in pending if results[index] is None]
+            if not pending:
+                break
+
+        elevations = []
+        for batch, heights in zip(batches, results):
+            # Keep the result aligned with the coordinates, a failed batch stays None
+            elevations.extend(heights if heights is not None else [None] * len(batch))
+        return elevations
+
+
+# Elevation provider interface: returns one elevation (or None) per (lon, lat) point, in the same order
+class ElevationProvider:
+    async def get_elevations(self, coordinates):
+        raise NotImplementedError
+
+
+# Elevations from the opentopodata HTTP API, sent through the ElevationScheduler
+# (over the shared HttpClient when one is given). With a `checkpoint` (an ElevationCache) every
+# batch is stored as soon as it arrives, so an interrupted or partly failed fetch resumes
+# with the missing batches only.
+class OpenTopoDataProvider(ElevationProvider):
+    def __init__(self, batch_size=100, requests_per_second=PUBLIC_API_RATE, max_concurrency=4, url=ELEVATION_URL,
+                 client=None, checkpoint=None):
+        self.batch_size = batch_size
+        self.client = client
+        self.checkpoint = checkpoint
+        self.scheduler = ElevationScheduler(requests_per_second=requests_per_second,
+                                            max_concurrency=max_concurrency, url=url)
+
+    async def get_elevations(self, coordinates):
+        on_batch = self.checkpoint.put_many if self.checkpoint is not None else None
+        async with session_scope(self.client) as session:
+            return await self.scheduler.fetch(session, coordinates, self.batch_size, on_batch)
+
+
+# Fill missing elevations (None / NaN) by linear interpolation along the route, `cumulative_km`
+# being the distance of every point from the start. Gaps at the ends take the nearest known
+# elevation. Returns the filled elevations (float array) and the number of filled points;
+# nothing is filled when no elevation is known.
+def fill_elevation_gaps(elevations, cumulative_km):
+    heights = np.array(elevations, dtype=np.float64)  # None becomes NaN
+    missing = np.isnan(heights)
+    if not missing.any() or missing.all():
+        return heights, 0
+    distance = np.asarray(cumulative_km, dtype=np.float64)
+    heights[missing] = np.interp(distance[missing], distance[~missing], heights[~missing])
+    return heights, int(missing.sum())
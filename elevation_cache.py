@@ -0,0 +1,103 @@
+import sqlite3
+
+import numpy as np
+
+NED10M_RESOLUTION = 1 / 3 / 3600  # 1/3 arc-second grid of the NED10m dataset, in degrees
+QUERY_CHUNK = 500  # Keys per SQL query, below the SQLite variable limit
+
+
+# Snap (lon, lat) points to the NED10m grid and pack the grid cell into one int64 key
+def quantize_keys(coordinates, resolution=NED10M_RESOLUTION):
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    lon_index = np.round(coords[:, 0] / resolution).astype(np.int64) + (1 << 23)
+    lat_index = np.round(coords[:, 1] / resolution).astype(np.int64) + (1 << 22)
+    return (lat_index << 24) | lon_index
+
+
+# On-disk elevation cache (SQLite) keyed by quantized coordinates, with LRU eviction
+# once it holds more than `max_entries` points
+class ElevationCache:
+    def __init__(self, path="elevation_cache.sqlite", max_entries=2_000_000, resolution=NED10M_RESOLUTION):
+        self.max_entries = max_entries
+        self.resolution = resolution
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS elevations "
+            "(key INTEGER PRIMARY KEY, elevation REAL NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS elevations_last_used ON elevations (last_used)")
+        # Logical clock for the LRU order, continues from the previous runs
+        self.clock = self.connection.execute("SELECT COALESCE(MAX(last_used), 0) FROM elevations").fetchone()[0]
+        # Running entry count, so storing a batch needs no COUNT(*) over the whole table
+        self.entries = self.connection.execute("SELECT COUNT(*) FROM elevations").fetchone()[0]
+
+    def __len__(self):
+        return self.entries
+
+    # Returns the cached elevations (None for misses) and the indices of the missed points
+    def get_many(self, coordinates):
+        keys = quantize_keys(coordinates, self.resolution).tolist()
+        found = {}
+        for i in range(0, len(keys), QUERY_CHUNK):
+            chunk = list(set(keys[i:i + QUERY_CHUNK]))
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT key, elevation FROM elevations WHERE key IN ({placeholders})", chunk
+            )
+            found.update(rows)
+
+        if found:
+            self.clock += 1
+            self.connection.executemany(
+                "UPDATE elevations SET last_used = ? WHERE key = ?", [(self.clock, key) for key in found]
+            )
+            self.connection.commit()
+
+        elevations = [found.get(key) for key in keys]
+        missing = [i for i, elevation in enumerate(elevations) if elevation is None]
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        return elevations, missing
+
+    # Store fetched elevations, points without an elevation are not cached
+    def put_many(self, coordinates, elevations):
+        keys = quantize_keys(coordinates, self.resolution).tolist()
+        self.clock += 1
+        rows = [(elevation, self.clock, key) for key, elevation in zip(keys, elevations) if elevation is not None]
+        # Known points are updated, the rows inserted on top of them are the new entries
+        self.connection.executemany("UPDATE elevations SET elevation = ?, last_used = ? WHERE key = ?", rows)
+        inserted = self.connection.executemany(
+            "INSERT OR IGNORE INTO elevations (elevation, last_used, key) VALUES (?, ?, ?)", rows
+        )
+        self.entries += inserted.rowcount
+        self.evict()
+        self.connection.commit()
+
+    # All cached points: (N, 2) array of grid cell centers (lon, lat) and their elevations
+    def items(self):
+        rows = np.array(self.connection.execute("SELECT key, elevation FROM elevations").fetchall(),
+                        dtype=np.float64).reshape(-1, 2)
+        keys = rows[:, 0].astype(np.int64)
+        lon = ((keys & ((1 << 24) - 1)) - (1 << 23)) * self.resolution
+        lat = ((keys >> 24) - (1 << 22)) * self.resolution
+        return np.column_stack((lon, lat)), rows[:, 1]
+
+    # Drop the least recently used points above the size limit
+    def evict(self):
+        excess = self.entries - self.max_entries
+        if excess > 0:
+            deleted = self.connection.execute(
+                "DELETE FROM elevations WHERE key IN "
+                "(SELECT key FROM elevations ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self.entries -= deleted.rowcount
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total > 0 else 0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": hit_rate, "entries": len(self)}
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,50 @@
+import numpy as np
+
+MILES_PER_KILOMETER = 0.621371
+
+# Slope limits
+MIN_SLOPE = -0.20  # Descent no more than -20%
+MAX_SLOPE = 0.20   # Ascent no more than 20%
+
+
+# Fuel consumption factor of every slope, the same piecewise rules as calculate_fuel_consumption
+def consumption_factors(slopes):
+    slopes = np.clip(slopes, MIN_SLOPE, MAX_SLOPE)
+    conditions = [
+        (slopes > 0) & (slopes <= 0.05),  # Gentle ascent: 10% increase per 1% ascent
+        slopes > 0.05,                    # Steep ascent: 15% increase per 1% ascent
+        (slopes >= -0.05) & (slopes < 0),  # Gentle descent: 2% decrease per 1% descent
+    ]
+    choices = [1 + slopes * 0.10, 1 + slopes * 0.15, 1 + slopes * 0.02]
+    return np.select(conditions, choices, default=1 + slopes * 0.05)  # Steep descent (or flat)
+
+
+# Slope (rise over run, both in meters) of every segment. Segments with a missing elevation
+# at either end (None / NaN) or with zero length are treated as flat.
+def segment_slopes(elevations, segment_distances_km):
+    heights = np.asarray(elevations, dtype=np.float64)
+    distances_m = np.asarray(segment_distances_km, dtype=np.float64) * 1000
+    rise = np.diff(heights)
+    valid = ~np.isnan(rise) & (distances_m > 0)
+    slopes = np.zeros_like(distances_m)
+    np.divide(rise, distances_m, out=slopes, where=valid)
+    return slopes
+
+
+# Fuel consumption factor of every segment of a route: its terrain profile, independent of the
+# vehicle (fuel of a segment = base_fuel_consumption * factor * miles / 100)
+def terrain_factors(elevations, segment_distances_km):
+    if len(elevations) != len(segment_distances_km) + 1:
+        raise ValueError(f"Expected {len(segment_distances_km) + 1} elevations for "
+                         f"{len(segment_distances_km)} segments, got {len(elevations)}")
+    return consumption_factors(segment_slopes(elevations, segment_distances_km))
+
+
+# Terrain-aware fuel consumption for every segment (gallons) and the total.
+# `elevations` has one value per route point (meters), `segment_distances_km` one value per segment,
+# `base_fuel_consumption` is in gallons per 100 miles.
+def calculate_fuel_profile(elevations, segment_distances_km, base_fuel_consumption):
+    factors = terrain_factors(elevations, segment_distances_km)
+    segment_miles = np.asarray(segment_distances_km, dtype=np.float64) * MILES_PER_KILOMETER
+    segment_fuel = base_fuel_consumption * factors * segment_miles / 100
+    return float(segment_fuel.sum()), segment_fuel
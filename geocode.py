@@ -0,0 +1,110 @@
+import csv
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ZIP_INDEX_PATH = os.environ.get("ZIP_INDEX_PATH", "zip_index.npy")
+ZIP_INDEX_DTYPE = np.dtype([("zip", "<i4"), ("lat", "<f8"), ("lon", "<f8")])
+
+# Column names of the Census ZCTA gazetteer file, and of a plain zip,lat,lon CSV
+GAZETTEER_COLUMNS = [("GEOID", "INTPTLAT", "INTPTLONG"), ("zip", "lat", "lon")]
+
+
+# 5-digit ZIP code as an integer, None for anything else (ZIP+4 keeps the first 5 digits)
+def zip_to_int(zip_code):
+    zip_code = str(zip_code).strip()[:5]
+    return int(zip_code) if len(zip_code) == 5 and zip_code.isdigit() else None
+
+
+# Build the ZIP index from a gazetteer file (tab- or comma-separated) and save it as one sorted
+# record array: ZIP -> centroid lookups are then a binary search over a memory-mapped file
+def build_zip_index(gazetteer_path, index_path=ZIP_INDEX_PATH):
+    with open(gazetteer_path, newline="") as file:
+        sample = file.readline()
+        file.seek(0)
+        reader = csv.reader(file, delimiter="\t" if "\t" in sample else ",")
+        header = [name.strip() for name in next(reader)]
+        for zip_column, lat_column, lon_column in GAZETTEER_COLUMNS:
+            if zip_column in header:
+                columns = [header.index(zip_column), header.index(lat_column), header.index(lon_column)]
+                break
+        else:
+            raise ValueError(f"Unknown gazetteer columns: {header}")
+
+        rows = []
+        for row in reader:
+            zip_code = zip_to_int(row[columns[0]])
+            if zip_code is not None:
+                rows.append((zip_code, float(row[columns[1]]), float(row[columns[2]])))
+
+    index = np.array(rows, dtype=ZIP_INDEX_DTYPE)
+    index.sort(order="zip")
+    np.save(index_path, index)
+    return len(index)
+
+
+# ZIP -> centroid index loaded (memory-mapped) from the file saved by build_zip_index
+class ZipIndex:
+    def __init__(self, records):
+        self.records = records
+        self.zips = records["zip"]
+
+    @classmethod
+    def load(cls, path=ZIP_INDEX_PATH):
+        return cls(np.load(path, mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.records)
+
+    # 'latitude,longitude' of the ZIP code, None when it is not in the index
+    def lookup(self, zip_code):
+        key = zip_to_int(zip_code)
+        if key is None:
+            return None
+        position = int(np.searchsorted(self.zips, key))
+        if position < len(self.zips) and self.zips[position] == key:
+            record = self.records[position]
+            return f"{record['lat']},{record['lon']}"
+        return None
+
+
+# Local ZIP geocoding: the index file (US only) first, then the memoized Nominatim results.
+# The index is loaded on the first lookup, a missing file just disables it.
+class ZipGeocoder:
+    def __init__(self, index_path=ZIP_INDEX_PATH):
+        self.index_path = index_path
+        self.index = None
+        self.index_loaded = False
+        self.memo = {}
+
+    def get_index(self):
+        if not self.index_loaded:
+            self.index_loaded = True
+            if self.index_path and Path(self.index_path).exists():
+                self.index = ZipIndex.load(self.index_path)
+        return self.index
+
+    def lookup(self, zip_code, country_code='US'):
+        coords = self.memo.get((country_code, str(zip_code)))
+        if coords is None and country_code == 'US' and self.get_index() is not None:
+            coords = self.index.lookup(zip_code)
+        return coords
+
+    # Remember a result found by Nominatim for an unknown code
+    def remember(self, zip_code, country_code, coords):
+        self.memo[(country_code, str(zip_code))] = coords
+
+
+zip_geocoder = ZipGeocoder()
+
+
+if __name__ == '__main__':
+    # python geocode.py <gazetteer file> [index file]
+    if len(sys.argv) < 2:
+        print("Usage: python geocode.py <gazetteer file> [index file]")
+        sys.exit(1)
+    output_path = sys.argv[2] if len(sys.argv) > 2 else ZIP_INDEX_PATH
+    count = build_zip_index(sys.argv[1], output_path)
+    print(f"ZIP index with {count} codes saved to '{output_path}'")
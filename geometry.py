@@ -0,0 +1,114 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371  # Earth's radius in km
+
+
+# Convert the OSRM coordinate list ([[lon, lat], ...]) into one (N, 2) float64 array
+def route_to_array(route):
+    coords = np.asarray(route, dtype=np.float64)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise ValueError(f"Expected an (N, 2) coordinate array, got shape {coords.shape}")
+    return coords
+
+
+# Vectorized haversine formula, arguments may be scalars or arrays of the same shape
+def haversine_np(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+# Distance in km of every segment of a (lon, lat) route, shape (N - 1,)
+def segment_distances(coords):
+    coords = route_to_array(coords)
+    lon, lat = coords[:, 0], coords[:, 1]
+    return haversine_np(lat[:-1], lon[:-1], lat[1:], lon[1:])
+
+
+# Distance in km from the start of the route to every point, shape (N,), starts with 0
+def cumulative_distance(coords):
+    distances = segment_distances(coords)
+    return np.concatenate(([0.0], np.cumsum(distances)))
+
+
+# Total route distance in km, same result as main.get_route_distance
+def route_distance(coords):
+    return float(segment_distances(coords).sum())
+
+
+# Evenly spaced inner points of the segments start[i] -> end[i], in route order: every segment gets
+# int(distance / max_distance_per_point) points. The spacing is computed with the same argument order
+# as interpolate_points_distance_based, so the number of inserted points matches it exactly
+def inner_points(start, end, max_distance_per_point=0.1):
+    distances = haversine_np(start[:, 0], start[:, 1], end[:, 0], end[:, 1])
+    num_points = (distances / max_distance_per_point).astype(np.int64)
+
+    # Segment index of every inner point
+    segment_index = np.repeat(np.arange(len(num_points)), num_points)
+
+    # Position i (1-based) of each inner point inside its segment
+    offsets = np.cumsum(num_points) - num_points
+    position = np.arange(int(num_points.sum())) - offsets[segment_index] + 1
+    fraction = position / (num_points[segment_index] + 1)
+
+    seg_start = start[segment_index]
+    seg_end = end[segment_index]
+    return seg_start + (seg_end - seg_start) * fraction[:, None]
+
+
+# Densify the route in one batch, same points as main.interpolate_points_distance_based:
+# the first point, the inner points of every segment and the original end point of the route
+def densify(coords, max_distance_per_point=0.1):
+    coords = route_to_array(coords)
+    if len(coords) < 2:
+        return np.concatenate((coords, coords[-1:]))
+
+    inner = inner_points(coords[:-1], coords[1:], max_distance_per_point)
+    return np.concatenate((coords[:1], inner, coords[-1:]))
+
+
+# Local planar projection of (lon, lat) points to meters (equirectangular around the mean latitude),
+# accurate enough for the distances of one route to its simplified line
+def project_meters(coords):
+    coords = route_to_array(coords)
+    scale = np.radians(EARTH_RADIUS_KM * 1000)
+    x = coords[:, 0] * scale * np.cos(np.radians(coords[:, 1].mean()))
+    y = coords[:, 1] * scale
+    return np.column_stack((x, y))
+
+
+# Douglas-Peucker simplification: the fewest route points such that no dropped point lies farther
+# than `tolerance_m` meters from the simplified line. Each split scans its whole range with NumPy.
+def simplify(coords, tolerance_m=10.0):
+    coords = route_to_array(coords)
+    if len(coords) < 3:
+        return coords
+    points = project_meters(coords)
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        inner = points[first + 1:last]
+        direction = end - start
+        length = np.hypot(*direction)
+        if length == 0:
+            distances = np.hypot(*(inner - start).T)
+        else:
+            # Distance to the segment (not the infinite line), the projection is clamped to its ends
+            t = np.clip((inner - start) @ direction / length ** 2, 0, 1)
+            distances = np.hypot(*(inner - start - t[:, None] * direction).T)
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return coords[keep]
@@ -0,0 +1,124 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Span that is currently open in this task. Tasks started inside a span inherit it (asyncio copies
+# the context), so spans of concurrent elevation batches nest under the stage that started them.
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+# Collects span durations (nanoseconds) per span path, keeping the last `max_samples` of each
+class SpanRecorder:
+    def __init__(self, enabled=False, max_samples=10_000):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self.samples = {}
+        self.totals = {}
+
+    def record(self, path, duration_ns):
+        samples = self.samples.get(path)
+        if samples is None:
+            samples = self.samples[path] = deque(maxlen=self.max_samples)
+            self.totals[path] = [0, 0]
+        samples.append(duration_ns)
+        totals = self.totals[path]
+        totals[0] += 1
+        totals[1] += duration_ns
+
+    def reset(self):
+        self.samples.clear()
+        self.totals.clear()
+
+    # count, total and p50/p95/p99 (over the kept samples) of every span path, in milliseconds
+    def summary(self):
+        result = {}
+        for path, samples in sorted(self.samples.items()):
+            count, total_ns = self.totals[path]
+            percentiles = np.percentile(np.fromiter(samples, dtype=np.int64), [q * 100 for q in QUANTILES])
+            result[path] = {
+                "count": count,
+                "total_ms": total_ns / 1e6,
+                **{f"p{round(q * 100)}_ms": value / 1e6 for q, value in zip(QUANTILES, percentiles)},
+            }
+        return result
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    # Prometheus text exposition format, one summary metric labelled by span path
+    def to_prometheus(self, metric="geofuel_span_duration_seconds"):
+        lines = [f"# HELP {metric} Duration of the quoting pipeline stages.", f"# TYPE {metric} summary"]
+        for path, stats in self.summary().items():
+            for q in QUANTILES:
+                value = stats[f"p{round(q * 100)}_ms"] / 1000
+                lines.append(f'{metric}{{span="{path}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'{metric}_sum{{span="{path}"}} {stats["total_ms"] / 1000:.9f}')
+            lines.append(f'{metric}_count{{span="{path}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+recorder = SpanRecorder(enabled=os.environ.get("GEOFUEL_TRACE") == "1")
+
+
+# Timed stage: `with span("fuel"):`. Nested spans are recorded under their parent path
+# ("quote/elevations/elevation_batch"). When `timings` (a dict) is given, the duration in seconds
+# is also added to it under the span name, even if the recorder is disabled.
+# With the recorder disabled and no `timings` a span only checks one flag.
+class span:
+    __slots__ = ("name", "timings", "path", "token", "start")
+
+    def __init__(self, name, timings=None):
+        self.name = name
+        self.timings = timings
+        self.token = None
+
+    def __enter__(self):
+        if recorder.enabled:
+            parent = current_span.get()
+            self.path = f"{parent}/{self.name}" if parent else self.name
+            self.token = current_span.set(self.path)
+        elif self.timings is None:
+            return self
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.token is None and self.timings is None:
+            return False
+        duration_ns = time.perf_counter_ns() - self.start
+        if self.token is not None:
+            current_span.reset(self.token)
+            self.token = None
+            recorder.record(self.path, duration_ns)
+        if self.timings is not None:
+            self.timings[self.name] = self.timings.get(self.name, 0) + duration_ns / 1e9
+        return False
+
+
+# Decorator: the whole call of a (sync or async) function is one span
+def instrumented(name):
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not recorder.enabled:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not recorder.enabled:
+                    return func(*args, **kwargs)
+                with span(name):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
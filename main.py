@@ -1,29 +1,29 @@
+import argparse
 import asyncio
-import time
+import os
+from pathlib import Path
 
 from math import radians, cos, sin, sqrt, atan2, ceil
-import aiohttp
-import folium
-import matplotlib.pyplot as plt
-
-def measure_time(func):
-    if asyncio.iscoroutinefunction(func):  # Check if the function is asynchronous
-        async def wrapper(*args, **kwargs):
-            start_time = time.time()
-            result = await func(*args, **kwargs)  # Asynchronous function execution
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            print(f"Function {func.__name__} took {elapsed_time:.6f} seconds")
-            return result
-    else:
-        def wrapper(*args, **kwargs):
-            start_time = time.time()
-            result = func(*args, **kwargs)  # Synchronous function execution
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            print(f"Function {func.__name__} took {elapsed_time:.6f} seconds")
-            return result
-    return wrapper
+import numpy as np
+
+from client import HttpClient, session_scope
+from instrumentation import span, instrumented, recorder
+from geometry import route_to_array, densify, segment_distances
+from fuel import calculate_fuel_profile
+from adaptive import adaptive_profile
+from elevation import fill_elevation_gaps, OpenTopoDataProvider, PUBLIC_API_RATE
+from elevation_cache import ElevationCache
+from dem import LocalDemProvider
+from geocode import zip_geocoder
+from route_cache import RouteCache
+from pipeline import stream_estimates
+from visualization import visualize_route, plot_elevations
+
+OSRM_URL = "http://router.project-osrm.org"
+NOMINATIM_URL = "https://nominatim.openstreetmap.org"
+
+# The interactive quote keeps its caches next to this script, whatever the working directory
+CACHE_DIR = Path(__file__).resolve().parent
 
 
 # Function to calculate the distance between two coordinates (haversine formula)
@@ -73,60 +73,68 @@ def interpolate_points_distance_based(route, max_distance_per_point=0.1):
     return detailed_route
 
 
-# Route visualization on the map
-def visualize_route(route):
-    # Create a map centered on the first point of the route
-    m = folium.Map(location=[route[0][1], route[0][0]], zoom_start=10)
-
-    # Add the route to the map
-    # Change the order of coordinates from (longitude, latitude) to (latitude, longitude)
-    folium.PolyLine([(lat, lon) for lon, lat in route], color="blue", weight=2.5, opacity=1).add_to(m)
-
-    # Add markers for the start and end of the route
-    folium.Marker([route[0][1], route[0][0]], tooltip="Start", icon=folium.Icon(color="green")).add_to(m)
-    folium.Marker([route[-1][1], route[-1][0]], tooltip="End", icon=folium.Icon(color="red")).add_to(m)
-
-    # Save the map to a file
-    m.save("route_map.html")
-    print("Map saved to 'route_map.html'")
+# With a RouteCache a repeated lane skips the OSRM request (and the JSON decoding)
+@instrumented("route_fetch")
+async def get_route(start, end, client=None, route_cache=None):
+    if route_cache is not None:
+        route = route_cache.get(start, end)
+        if route is not None:
+            return route
 
-
-async def get_route(start, end):
     start_lat, start_lon = start.split(",")
     end_lat, end_lon = end.split(",")
 
-    url = f"http://router.project-osrm.org/route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}?overview=full&geometries=geojson"
+    url = f"{OSRM_URL}/route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}?overview=full&geometries=geojson"
 
-    async with aiohttp.ClientSession() as session:
+    async with session_scope(client) as session:
         async with session.get(url) as response:
             data = await response.json()
             if 'routes' in data:
-                return data['routes'][0]['geometry']['coordinates']
+                route = data['routes'][0]['geometry']['coordinates']
+                if route_cache is not None:
+                    route_cache.put(start, end, route)
+                return route
             else:
                 print(f"Error: {data}")
                 return None
 
 
-# Fetching elevations by coordinates
-async def get_elevations_batch(session, coordinates):
-    locations = "|".join([f"{lat},{lon}" for lon, lat in coordinates])
-    url = f"https://api.opentopodata.org/v1/ned10m?locations={locations}"
-    async with session.get(url) as response:
-        data = await response.json()
-        return [result.get('elevation') for result in data.get('results', [])]
-
-
 # Function is responsible for the number of coordinates (points) sent in a single request to the API,
-# limited to 100 points per request (batch_size=100)
-@measure_time
-async def fetch_elevations(coordinates, batch_size=100):
-    elevations = []
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(coordinates), batch_size):
-            batch = coordinates[i:i + batch_size]
-            heights = await get_elevations_batch(session, batch)
-            elevations.extend(heights)
-            await asyncio.sleep(1.01)  # Delay between requests
+# limited to 100 points per request (batch_size=100). Batches are sent concurrently by the scheduler,
+# within the requests-per-second budget of the elevation API.
+# Another elevation source (e.g. LocalDemProvider) can be passed as `provider`.
+# With an ElevationCache only the points missing from the cache are requested (and every fetched
+# batch is checkpointed into it right away). With a SpatialElevationIndex points close to an already
+# known sample reuse its elevation and the fetched points are added to the index.
+@instrumented("fetch_elevations")
+async def fetch_elevations(coordinates, batch_size=100, requests_per_second=PUBLIC_API_RATE, max_concurrency=4,
+                           cache=None, provider=None, client=None, spatial_index=None):
+    if provider is None:
+        provider = OpenTopoDataProvider(batch_size, requests_per_second, max_concurrency, client=client,
+                                        checkpoint=cache)
+
+    elevations = [None] * len(coordinates)
+    missing = list(range(len(coordinates)))
+    if cache is not None:
+        elevations, missing = cache.get_many(coordinates)
+
+    if missing and spatial_index is not None:
+        nearby = spatial_index.lookup([coordinates[i] for i in missing])
+        for i, height in zip(missing, nearby):
+            elevations[i] = height
+        missing = [i for i, height in zip(missing, nearby) if height is None]
+
+    if missing:
+        to_fetch = [coordinates[i] for i in missing]
+        fetched = await provider.get_elevations(to_fetch)
+
+        # A provider checkpointing into the cache has already stored every batch
+        if cache is not None and getattr(provider, "checkpoint", None) is not cache:
+            cache.put_many(to_fetch, fetched)
+        if spatial_index is not None:
+            spatial_index.add(to_fetch, fetched)
+        for i, height in zip(missing, fetched):
+            elevations[i] = height
     return elevations
 
 
@@ -212,9 +220,15 @@ def calculate_price(distance, fuel_consumption, fuel_cost):
     return total_price
 
 
-async def get_coordinates_by_zip(zip_code, country_code='US'):
-    url = f"https://nominatim.openstreetmap.org/search?postalcode={zip_code}&countrycodes={country_code}&format=json"
-    async with aiohttp.ClientSession() as session:
+# The local ZIP index is used first, Nominatim is only asked for unknown codes (and the answer is memoized)
+@instrumented("geocode")
+async def get_coordinates_by_zip(zip_code, country_code='US', client=None):
+    coords = zip_geocoder.lookup(zip_code, country_code)
+    if coords:
+        return coords
+
+    url = f"{NOMINATIM_URL}/search?postalcode={zip_code}&countrycodes={country_code}&format=json"
+    async with session_scope(client) as session:
         async with session.get(url) as response:
             data = await response.json()
             if data:
@@ -223,48 +237,263 @@ async def get_coordinates_by_zip(zip_code, country_code='US'):
                 lat = location['lat']
                 lon = location['lon']
                 print(location['display_name'])  # Output the name associated with the ZIP code
-                return f"{lat},{lon}"  # Return in 'latitude,longitude' format
+                coords = f"{lat},{lon}"  # Return in 'latitude,longitude' format
+                zip_geocoder.remember(zip_code, country_code, coords)
+                return coords
             else:
                 print(f"Could not find coordinates for ZIP code {zip_code}")
                 return None
 
 
-async def get_route_by_zip(start_zip, end_zip, country_code='US'):
+async def get_route_by_zip(start_zip, end_zip, country_code='US', client=None, route_cache=None):
     # If coordinates need to be passed instead of ZIP codes, obtain them using the coordinates retrieval function
-    start_coords = await get_coordinates_by_zip(start_zip, country_code)
-    end_coords = await get_coordinates_by_zip(end_zip, country_code)
+    start_coords = await get_coordinates_by_zip(start_zip, country_code, client)
+    end_coords = await get_coordinates_by_zip(end_zip, country_code, client)
 
-    # If coordinates are successfully obtained
+    # If coordinates are successfully obtained, request the route from OSRM
     if start_coords and end_coords:
-        start_lat, start_lon = start_coords.split(",")
-        end_lat, end_lon = end_coords.split(",")
-
-        # URL for requesting a route to OSRM
-        url = f"http://router.project-osrm.org/route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}?overview=full&geometries=geojson"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                data = await response.json()
-                if 'routes' in data:
-                    return data['routes'][0]['geometry']['coordinates']
-                else:
-                    print(f"Error in the route: {data}")
-                    return None
+        return await get_route(start_coords, end_coords, client, route_cache)
     else:
         print("Could not obtain coordinates for one of the points.")
         return None
 
 
 
-# Main steps
-async def main():
+BASE_FUEL_CONSUMPTION = 5.75  # Fuel consumption in gallons per 100 miles
+FUEL_COST_PER_GALLON = 3.50  # Price per gallon in $
+
+
+def calculator(distance, fuel_cost):
+    hours = distance * 2 / 60  # speed 60 miles per hour
+    driver_work_days = ceil(hours / 11)  # maximum number of days for the trip
+    drivers_salary = (20 * 11) * driver_work_days  # driver’s salary per day
+    fuel_cost_total = fuel_cost * 2  # fuel cost for a round trip
+    total_expenses = drivers_salary + fuel_cost_total  # total road expenses
+
+    return round(total_expenses * 0.75)  # return 75% of the total cost
+
+
+# Route for a start/end pair, each given either as a ZIP code or as 'latitude,longitude'
+async def get_route_for(start, end, client=None, route_cache=None):
+    start_coords = await get_coordinates_for(start, client)
+    end_coords = await get_coordinates_for(end, client)
+    if start_coords and end_coords:
+        return await get_route(start_coords, end_coords, client=client, route_cache=route_cache)
+    print("Could not obtain coordinates for one of the points.")
+    return None
+
+
+# 'latitude,longitude' of a point given either as a ZIP code or as 'latitude,longitude'
+async def get_coordinates_for(point, client=None):
+    if point.isdigit():
+        return await get_coordinates_by_zip(point, client=client)
+    return point
+
+
+# Route through several stops ('latitude,longitude') with OSRM's multi-coordinate route service,
+# split into the coordinates of every leg (stop i -> stop i + 1). The legs are cached one by one,
+# so a lane that is a leg of another quote needs no new request.
+@instrumented("route_fetch")
+async def get_route_legs(stops, client=None, route_cache=None):
+    pairs = list(zip(stops, stops[1:]))
+    if route_cache is not None:
+        legs = [route_cache.get(start, end) for start, end in pairs]
+        if all(leg is not None for leg in legs):
+            return legs
+
+    coordinates = ";".join(f"{lon},{lat}" for lat, lon in (stop.split(",") for stop in stops))
+    url = f"{OSRM_URL}/route/v1/driving/{coordinates}?overview=false&steps=true&geometries=geojson"
+
+    async with session_scope(client) as session:
+        async with session.get(url) as response:
+            data = await response.json()
+    if 'routes' not in data:
+        print(f"Error: {data}")
+        return None
+
+    legs = []
+    for (start, end), leg in zip(pairs, data['routes'][0]['legs']):
+        # Consecutive steps share their end points
+        coords = [point for step in leg['steps'] for point in step['geometry']['coordinates']]
+        route = [point for i, point in enumerate(coords) if i == 0 or point != coords[i - 1]]
+        if route_cache is not None:
+            route_cache.put(start, end, route)
+        legs.append(route)
+    return legs
+
+
+# Road distances (km) and durations (s) between every origin and destination ('latitude,longitude')
+# from one request to OSRM's table service, as two (origins, destinations) arrays
+@instrumented("route_fetch")
+async def get_table(origins, destinations, client=None):
+    points = list(origins) + list(destinations)
+    coordinates = ";".join(f"{lon},{lat}" for lat, lon in (point.split(",") for point in points))
+    sources = ";".join(str(i) for i in range(len(origins)))
+    targets = ";".join(str(i) for i in range(len(origins), len(points)))
+    url = (f"{OSRM_URL}/table/v1/driving/{coordinates}?sources={sources}&destinations={targets}"
+           f"&annotations=distance,duration")
+
+    async with session_scope(client) as session:
+        async with session.get(url) as response:
+            data = await response.json()
+    if 'distances' not in data:
+        print(f"Error: {data}")
+        return None
+    # Unreachable pairs are null
+    distances = np.array(data['distances'], dtype=np.float64) / 1000
+    durations = np.array(data['durations'], dtype=np.float64)
+    return distances, durations
+
+
+# Quote for a fetched route: densify -> distance -> elevations -> fuel consumption -> price.
+# In the adaptive mode flat stretches are sampled coarsely (see adaptive.adaptive_profile).
+# With a workers.RouteProcessPool the densification and the fuel profile run in worker processes.
+# Elevations still missing after the fetch are interpolated along the route (fill_gaps=False keeps
+# them missing, their segments then count as flat), the completeness of the fetched heights is
+# reported as "height_accuracy". Stage durations are added to `timings` when a dict is given.
+async def quote_route(route, client=None, cache=None, provider=None, adaptive=False, timings=None,
+                      base_fuel_consumption=BASE_FUEL_CONSUMPTION, fuel_cost_per_gallon=FUEL_COST_PER_GALLON,
+                      pool=None, fill_gaps=True, spatial_index=None):
+    async def get_elevations(points):
+        return await fetch_elevations(points, batch_size=100, cache=cache, provider=provider, client=client,
+                                      spatial_index=spatial_index)
+
+    if adaptive:
+        with span("elevations", timings):
+            profile = await adaptive_profile(route_to_array(route), get_elevations)
+        detailed_route = profile["points"].tolist()
+        distances = profile["segment_distances"]
+        elevations = [None if np.isnan(height) else float(height) for height in profile["elevations"]]
+    elif pool is not None:
+        with span("densify", timings):
+            detailed_coords, distances = await pool.densify(route_to_array(route))
+            detailed_route = detailed_coords.tolist()
+        with span("elevations", timings):
+            elevations = await get_elevations(detailed_route)
+    else:
+        with span("densify", timings):
+            # Increase the detail of the route (vectorized, same points as interpolate_points_distance_based)
+            detailed_coords = densify(route_to_array(route))
+            detailed_route = detailed_coords.tolist()
+        with span("distance", timings):
+            distances = segment_distances(detailed_coords)
+        with span("elevations", timings):
+            elevations = await get_elevations(detailed_route)
+
+    # Completeness of the fetched elevations, before any gap is filled
+    total_heights, none_count, accuracy_percentage = calculate_height_accuracy(elevations)
+    if none_count and fill_gaps:
+        cumulative_km = np.concatenate(([0.0], np.cumsum(distances)))
+        filled, _ = fill_elevation_gaps(elevations, cumulative_km)
+        elevations = [None if np.isnan(height) else float(height) for height in filled]
+
+    with span("fuel", timings):
+        # Get the total distance of the route in kilometers and convert it to miles,
+        # then calculate fuel consumption segment by segment
+        total_distance_miles = kilometers_to_miles(float(distances.sum()))
+        if pool is not None:
+            fuel_consumption, segment_fuel = await pool.fuel_profile(elevations, distances, base_fuel_consumption)
+        else:
+            fuel_consumption, segment_fuel = calculate_fuel_profile(elevations, distances, base_fuel_consumption)
+        total_fuel_cost = fuel_consumption * fuel_cost_per_gallon
+
+    with span("price", timings):
+        price = calculate_price(total_distance_miles, fuel_consumption, fuel_cost_per_gallon)
+        total_cost = calculator(total_distance_miles, total_fuel_cost)
+
+    return {
+        "detailed_route": detailed_route,
+        "elevations": elevations,
+        "segment_fuel": segment_fuel,
+        "segment_distances": distances,
+        "points": total_heights,
+        "height_accuracy": accuracy_percentage,
+        "missing_heights": none_count,
+        "distance_miles": total_distance_miles,
+        "fuel_consumption": fuel_consumption,
+        "fuel_cost": total_fuel_cost,
+        "price": price,
+        "total_cost": total_cost,
+    }
+
+
+# Streaming quote for a fetched route (pipeline.stream_estimates): the fuel is computed batch by batch
+# while the elevations arrive, so memory stays bounded and `on_estimate` gets every running estimate.
+# Elevations go through the same cache and spatial index as quote_route and gaps are filled the same
+# way, so the totals are those of quote_route (without the densified route and its elevations).
+async def stream_quote(route, client=None, cache=None, provider=None, spatial_index=None, on_estimate=None,
+                       base_fuel_consumption=BASE_FUEL_CONSUMPTION, fuel_cost_per_gallon=FUEL_COST_PER_GALLON):
+    if provider is None:
+        # One provider for all batches, so the rate limit of the elevation API applies to the whole route
+        provider = OpenTopoDataProvider(client=client, checkpoint=cache)
+
+    async def get_elevations(points):
+        return await fetch_elevations(points, batch_size=100, cache=cache, provider=provider, client=client,
+                                      spatial_index=spatial_index)
+
+    async for estimate in stream_estimates(route, get_elevations, base_fuel_consumption):
+        if on_estimate is not None:
+            on_estimate(estimate)
+
+    total_fuel_cost = estimate["fuel_consumption"] * fuel_cost_per_gallon
+    return {
+        **estimate,
+        "fuel_cost": total_fuel_cost,
+        "price": calculate_price(estimate["distance_miles"], estimate["fuel_consumption"], fuel_cost_per_gallon),
+        "total_cost": calculator(estimate["distance_miles"], total_fuel_cost),
+    }
+
+
+# Quote for one lane, None when the route cannot be obtained
+@instrumented("quote")
+async def quote_lane(start, end, client=None, cache=None, provider=None, route_cache=None, adaptive=False,
+                     timings=None, base_fuel_consumption=BASE_FUEL_CONSUMPTION,
+                     fuel_cost_per_gallon=FUEL_COST_PER_GALLON, pool=None, spatial_index=None):
+    with span("route", timings):
+        route = await get_route_for(start, end, client=client, route_cache=route_cache)
+    if not route:
+        return None
+    return await quote_route(route, client=client, cache=cache, provider=provider, adaptive=adaptive,
+                             timings=timings, base_fuel_consumption=base_fuel_consumption,
+                             fuel_cost_per_gallon=fuel_cost_per_gallon, pool=pool, spatial_index=spatial_index)
+
+
+# Numbers of a quote that are reported to clients (batch results, the HTTP service)
+def quote_summary(quote):
+    return {
+        "distance_miles": round(quote["distance_miles"], 2),
+        "points": len(quote["detailed_route"]),
+        "fuel_consumption": round(quote["fuel_consumption"], 2),
+        "fuel_cost": round(quote["fuel_cost"], 2),
+        "price": round(quote["price"], 2),
+        "total_cost": quote["total_cost"],
+        "height_accuracy": round(quote["height_accuracy"], 2),
+    }
+
+
+# Main steps, all requests of the quote go through one pooled HTTP client.
+# With visualize=False (--no-viz) no map or elevation graph is produced and folium/matplotlib are never imported,
+# the quote is streamed (stream_quote) and its running estimate printed batch by batch.
+async def main(visualize=True, base_fuel_consumption=BASE_FUEL_CONSUMPTION,
+               fuel_cost_per_gallon=FUEL_COST_PER_GALLON):
+    async with HttpClient() as client:
+        await run_quote(client, visualize, base_fuel_consumption, fuel_cost_per_gallon)
+
+
+# Running estimate of stream_quote, one line per elevation batch
+def print_estimate(estimate):
+    print(f'{estimate["points"]} points, {estimate["distance_miles"]:.2f} miles, '
+          f'{estimate["fuel_consumption"]:.2f} gallons so far')
+
+
+async def run_quote(client, visualize=True, base_fuel_consumption=BASE_FUEL_CONSUMPTION,
+                    fuel_cost_per_gallon=FUEL_COST_PER_GALLON):
     start = input("Enter the ZIP code of the START point: ")
     end = input("Enter the ZIP code of the END point: ")
 
-    if start.isdigit():
-        route = await get_route_by_zip(start, end)
-    else:
-        route = await get_route(start, end)
+    route_cache = RouteCache(CACHE_DIR / "route_cache.sqlite")
+    route = await get_route_for(start, end, client=client, route_cache=route_cache)
+    route_cache.close()
 
     # start = input("Enter the coordinates of the START point (latitude,longitude): ")
     # end = input("Enter the coordinates of the END point (latitude,longitude): ")
@@ -300,71 +529,68 @@ async def main():
     # end = '30.271129,-97.743700'  # Austin
 
     if route:
-        # Increase the detail of the route
-        detailed_route = interpolate_points_distance_based(route)
-        visualize_route(detailed_route)
-
-        # Get the total distance of the route in kilometers and convert it to miles
-        total_distance = get_route_distance(detailed_route)
-        total_distance_miles = total_distance * 0.621371
-        print(f'Total distance: {total_distance_miles:.2f} miles')
-
         print(f'_______________\n'
               f'The program is running, please wait, it may take about 1 minute\n'
               f'_______________')
 
-        # Get the elevations for the route and calculate fuel consumption
-        elevations = await fetch_elevations(detailed_route, batch_size=100)
+        # Local DEM tiles are used instead of the HTTP API when DEM_TILES_DIR is set
+        provider = None
+        if os.environ.get("DEM_TILES_DIR"):
+            provider = LocalDemProvider.from_directory(os.environ["DEM_TILES_DIR"])
+
+        cache = ElevationCache(CACHE_DIR / "elevation_cache.sqlite")
+        if visualize:
+            quote = await quote_route(route, client=client, cache=cache, provider=provider,
+                                      base_fuel_consumption=base_fuel_consumption,
+                                      fuel_cost_per_gallon=fuel_cost_per_gallon)
+        else:
+            # Headless: no map needs the densified route, the estimate is reported as the elevations arrive
+            quote = await stream_quote(route, client=client, cache=cache, provider=provider,
+                                       on_estimate=print_estimate, base_fuel_consumption=base_fuel_consumption,
+                                       fuel_cost_per_gallon=fuel_cost_per_gallon)
+        print(f"Elevation cache: {cache.stats()}")
+        cache.close()
+
+        if visualize:
+            visualize_route(quote["detailed_route"])
+
+        print(f'Total distance: {quote["distance_miles"]:.2f} miles')
         # Output the number of points and elevations
-        print(f"Total points: {len(detailed_route)}")
+        print(f"Total points: {quote['points']}")
         # print(f"Elevations: {elevations}")
+        print(f'Fuel consumption: {quote["fuel_consumption"]:.2f} gallons')
+        print(f'Fuel cost: {quote["fuel_cost"]:.2f} $')
+        print(f'Elevation completeness: {quote["height_accuracy"]:.1f}% '
+              f'({quote["missing_heights"]} missing heights interpolated)')
+        print(f"TOTAL COST FOR CLIENTS: ${quote['total_cost']}")
 
-        base_fuel_consumption = 5.75  # Fuel consumption in gallons per 100 miles
-        fuel_consumption = calculate_fuel_consumption(elevations, base_fuel_consumption, total_distance_miles)
-        print(f'Fuel consumption: {fuel_consumption:.2f} gallons')
-
-        # Calculate fuel cost
-        fuel_cost_per_gallon = 3.50  # Price per gallon in $
-        total_fuel_cost = fuel_consumption * fuel_cost_per_gallon
-        print(f'Fuel cost: {total_fuel_cost:.2f} $')
-
-
-        def calculator(distance, fuel_cost):
-            hours = distance * 2 / 60  # speed 60 miles per hour
-            driver_work_days = ceil(hours / 11)  # maximum number of days for the trip
-            drivers_salary = (20 * 11) * driver_work_days  # driver’s salary per day
-            fuel_cost_total = fuel_cost * 2  # fuel cost for a round trip
-            total_expenses = drivers_salary + fuel_cost_total  # total road expenses
+        # Stage timings, recorded when the program runs with GEOFUEL_TRACE=1
+        if recorder.enabled:
+            print(f"Stage timings:\n{recorder.to_json()}")
 
-            return round(total_expenses * 0.75)  # return 75% of the total cost
-
-        cost = calculator(total_distance_miles, total_fuel_cost)
-        print(f"TOTAL COST FOR CLIENTS: ${cost}")
-
-        choice = input('Print elevations? Press 0 or 1:  ')
-        # print(elevations)
-        if choice == '1':
-            # import matplotlib.pyplot as plt
-
-            # Your data
-            # data = elevations
-            # print(data)
-
-            # Create a graph
-            plt.figure(figsize=(12, 6))
-            plt.plot(elevations, marker='o', linestyle=':', color='purple')  # Dotted line
-            plt.title('Elevation visualization from start to finish')
-            plt.xlabel(f'Number of points along the route\none point represents 0.1 mile*')
-            plt.ylabel('Elevation above sea level')
-            plt.grid()
-            plt.show()
+        if visualize:
+            choice = input('Print elevations? Press 0 or 1:  ')
+            if choice == '1':
+                plot_elevations(quote["elevations"])
 
     else:
         print("Failed to get the route")
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Route fuel consumption and price quote")
+    parser.add_argument("--no-viz", action="store_true",
+                        help="Headless mode: no route map and no elevation graph, the estimate is streamed")
+    parser.add_argument("--base-fuel-consumption", type=float, default=BASE_FUEL_CONSUMPTION,
+                        help="Gallons per 100 miles")
+    parser.add_argument("--fuel-price", type=float, default=FUEL_COST_PER_GALLON, help="Price per gallon in $")
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
+    args = parse_args()
 
     # Start the program
-    asyncio.run(main())
+    asyncio.run(main(visualize=not args.no_viz, base_fuel_consumption=args.base_fuel_consumption,
+                     fuel_cost_per_gallon=args.fuel_price))
 
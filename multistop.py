@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import math
+
+import numpy as np
+
+from client import HttpClient
+from elevation import OpenTopoDataProvider, PUBLIC_API_RATE
+from elevation_cache import ElevationCache, quantize_keys
+from geometry import route_to_array, densify
+from route_cache import RouteCache, route_key
+from main import (get_coordinates_for, get_route, get_route_legs, get_table, fetch_elevations, quote_route,
+                  calculate_price, calculator, BASE_FUEL_CONSUMPTION, FUEL_COST_PER_GALLON)
+
+
+# Quotes legs (start -> end) once: a leg shared by several multi-stop routes or matrix cells reuses the
+# first computation, concurrent requests for the same leg wait for it. Only the leg totals are kept.
+# Without an elevation cache an in-memory one is used, so a road stretch already fetched for an earlier
+# leg (same OSRM vertices, hence the same densified points) is not fetched again. Legs computed at the
+# same time each fetch their own points unless their routes are prefetched together first.
+class LegQuoter:
+    def __init__(self, client=None, cache=None, provider=None, route_cache=None, adaptive=False,
+                 base_fuel_consumption=BASE_FUEL_CONSUMPTION, pool=None):
+        self.client = client
+        self.cache = cache if cache is not None else ElevationCache(":memory:")
+        self.provider = provider
+        self.route_cache = route_cache
+        self.adaptive = adaptive
+        self.base_fuel_consumption = base_fuel_consumption
+        self.pool = pool
+        self.legs = {}
+        self.computed = 0
+        self.reused = 0
+
+    def __contains__(self, leg):
+        return route_key(*leg) in self.legs
+
+    # Totals of one leg, None when its route cannot be obtained or the quote fails. `route` skips the
+    # OSRM request. A failed leg is forgotten, so a later quote tries it again.
+    async def quote(self, start, end, route=None):
+        key = route_key(start, end)
+        task = self.legs.get(key)
+        if task is None:
+            task = self.legs[key] = asyncio.ensure_future(self.compute(start, end, route))
+            self.computed += 1
+        else:
+            self.reused += 1
+        try:
+            leg = await task
+        except Exception as error:
+            print(f"Failed to quote the leg {start} -> {end}: {error!r}")
+            leg = None
+        if leg is None and self.legs.get(key) is task:
+            del self.legs[key]
+        return leg
+
+    async def compute(self, start, end, route):
+        if route is None:
+            route = await get_route(start, end, client=self.client, route_cache=self.route_cache)
+            if not route:
+                return None
+        quote = await quote_route(route, client=self.client, cache=self.cache, provider=self.provider,
+                                  adaptive=self.adaptive, base_fuel_consumption=self.base_fuel_consumption,
+                                  pool=self.pool)
+        return {
+            "distance_miles": quote["distance_miles"],
+            "fuel_consumption": quote["fuel_consumption"],
+            "points": len(quote["detailed_route"]),
+            "missing_heights": quote["missing_heights"],
+        }
+
+    # Fetch the elevations of several leg routes in one go, before the legs are quoted concurrently:
+    # the densified points of all routes are reduced to distinct elevation cache cells, so a stretch
+    # shared by several legs is requested once, and every leg then finds its points in the cache.
+    # Nothing is prefetched in the adaptive mode, which fetches only some of the points.
+    async def prefetch(self, routes):
+        if self.adaptive or not routes:
+            return
+        points = np.concatenate([densify(route_to_array(route)) for route in routes])
+        _, first = np.unique(quantize_keys(points, self.cache.resolution), return_index=True)
+        try:
+            await fetch_elevations(points[np.sort(first)].tolist(), cache=self.cache, provider=self.provider,
+                                   client=self.client)
+        except Exception as error:
+            # The legs fetch their own points
+            print(f"Failed to prefetch the elevations: {error!r}")
+
+    def stats(self):
+        return {"legs_computed": self.computed, "legs_reused": self.reused, "elevation_cache": self.cache.stats()}
+
+
+# Quote of a trip made of legs, with the same fields as main.quote_summary
+def combine_legs(legs, fuel_cost_per_gallon=FUEL_COST_PER_GALLON):
+    distance_miles = sum(leg["distance_miles"] for leg in legs)
+    fuel_consumption = sum(leg["fuel_consumption"] for leg in legs)
+    fuel_cost = fuel_consumption * fuel_cost_per_gallon
+    points = sum(leg["points"] for leg in legs)
+    missing_heights = sum(leg["missing_heights"] for leg in legs)
+    return {
+        "distance_miles": round(distance_miles, 2),
+        "points": points,
+        "fuel_consumption": round(fuel_consumption, 2),
+        "fuel_cost": round(fuel_cost, 2),
+        "price": round(calculate_price(distance_miles, fuel_consumption, fuel_cost_per_gallon), 2),
+        "total_cost": calculator(distance_miles, fuel_cost),
+        "height_accuracy": round((points - missing_heights) / points * 100, 2) if points else 100.0,
+        "legs": len(legs),
+    }
+
+
+# Quote of a route through several stops (ZIP codes or 'latitude,longitude'), None when a stop or
+# a leg cannot be obtained. The geometry of all legs comes from one multi-coordinate OSRM request,
+# unless every leg has already been quoted.
+async def quote_stops(stops, quoter, fuel_cost_per_gallon=FUEL_COST_PER_GALLON):
+    points = [await get_coordinates_for(stop, quoter.client) for stop in stops]
+    if len(points) < 2 or not all(points):
+        print("Could not obtain coordinates for one of the stops.")
+        return None
+
+    pairs = list(zip(points, points[1:]))
+    routes = [None] * len(pairs)
+    if not all(pair in quoter for pair in pairs):
+        routes = await get_route_legs(points, client=quoter.client, route_cache=quoter.route_cache)
+        if routes is None:
+            return None
+
+    legs = await asyncio.gather(*(quoter.quote(start, end, route) for (start, end), route in zip(pairs, routes)))
+    if not all(legs):
+        return None
+    return combine_legs(legs, fuel_cost_per_gallon)
+
+
+# Quotes for every origin -> destination pair (N x M). Each distinct pair is routed once and quoted as
+# a leg (a point that is both an origin and a destination costs nothing). The routes of all new legs
+# are fetched first and their elevations together (LegQuoter.prefetch), so road stretches shared by
+# several cells are fetched once, then every leg only computes its fuel from the cache. The OSRM
+# table request adds the road distances and durations of all pairs to the result.
+async def quote_matrix(origins, destinations, quoter, fuel_cost_per_gallon=FUEL_COST_PER_GALLON):
+    origin_points = [await get_coordinates_for(point, quoter.client) for point in origins]
+    destination_points = [await get_coordinates_for(point, quoter.client) for point in destinations]
+    if not all(origin_points) or not all(destination_points):
+        print("Could not obtain coordinates for one of the points.")
+        return None
+
+    table = await get_table(origin_points, destination_points, client=quoter.client)
+
+    pairs = {route_key(start, end): (start, end) for start in origin_points for end in destination_points
+             if route_key(start, end) != route_key(start, start) and (start, end) not in quoter}
+    fetched = await asyncio.gather(*(get_route(start, end, client=quoter.client, route_cache=quoter.route_cache)
+                                     for start, end in pairs.values()), return_exceptions=True)
+    # Failed routes are requested again by their leg
+    routes = {key: route for key, route in zip(pairs, fetched) if route and not isinstance(route, BaseException)}
+    await quoter.prefetch(list(routes.values()))
+
+    async def cell(start, end):
+        if route_key(start, end) == route_key(start, start):  # Same point
+            return combine_legs([], fuel_cost_per_gallon)
+        leg = await quoter.quote(start, end, routes.get(route_key(start, end)))
+        return combine_legs([leg], fuel_cost_per_gallon) if leg is not None else None
+
+    cells = await asyncio.gather(*(cell(start, end) for start in origin_points for end in destination_points))
+    quotes = [cells[i:i + len(destinations)] for i in range(0, len(cells), len(destinations))]
+    result = {"origins": list(origins), "destinations": list(destinations), "quotes": quotes}
+    if table is not None:
+        distances, durations = table
+        result["road_distance_km"] = [[None if math.isnan(km) else round(km, 2) for km in row]
+                                      for row in distances.tolist()]
+        result["duration_hours"] = [[None if math.isnan(s) else round(s / 3600, 2) for s in row]
+                                    for row in durations.tolist()]
+    return result
+
+
+async def run(args):
+    cache = ElevationCache(args.cache) if args.cache else None
+    route_cache = RouteCache(args.route_cache) if args.route_cache else None
+    async with HttpClient() as client:
+        provider = OpenTopoDataProvider(requests_per_second=args.requests_per_second, client=client,
+                                        checkpoint=cache)
+        quoter = LegQuoter(client, cache, provider, route_cache, base_fuel_consumption=args.base_fuel_consumption)
+        if args.command == "stops":
+            result = await quote_stops(args.stops, quoter, args.fuel_price)
+        else:
+            result = await quote_matrix(args.origins, args.destinations, quoter, args.fuel_price)
+    print(json.dumps(result, indent=2))
+    print(f"Legs: {quoter.stats()}")
+    quoter.cache.close()
+    if route_cache is not None:
+        route_cache.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-stop and origin/destination matrix quotes")
+    parser.add_argument("--requests-per-second", type=float, default=PUBLIC_API_RATE,
+                        help="Elevation API budget shared by all legs")
+    parser.add_argument("--cache", default="elevation_cache.sqlite", help="Elevation cache file, '' to disable")
+    parser.add_argument("--route-cache", default="route_cache.sqlite", help="Route cache file, '' to disable")
+    parser.add_argument("--base-fuel-consumption", type=float, default=BASE_FUEL_CONSUMPTION,
+                        help="Gallons per 100 miles")
+    parser.add_argument("--fuel-price", type=float, default=FUEL_COST_PER_GALLON, help="Price per gallon in $")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stops = commands.add_parser("stops", help="Route through several stops, in order")
+    stops.add_argument("stops", nargs="+", help="ZIP codes or 'latitude,longitude'")
+    matrix = commands.add_parser("matrix", help="Quotes for every origin/destination pair")
+    matrix.add_argument("--origins", nargs="+", required=True, help="ZIP codes or 'latitude,longitude'")
+    matrix.add_argument("--destinations", nargs="+", required=True, help="ZIP codes or 'latitude,longitude'")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.run(run(parse_args()))
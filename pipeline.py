@@ -0,0 +1,134 @@
+import asyncio
+from collections import deque
+
+import numpy as np
+
+from elevation import fill_elevation_gaps
+from fuel import calculate_fuel_profile, MILES_PER_KILOMETER
+from geometry import route_to_array, inner_points, segment_distances
+
+
+# Lazily densify the route: yields arrays of points (same points as geometry.densify) built from
+# `segments_per_chunk` OSRM segments at a time, so the whole densified route never exists in memory
+async def densified_chunks(route, max_distance_per_point=0.1, segments_per_chunk=50):
+    coords = route_to_array(route)
+    yield coords[:1]
+    for i in range(0, len(coords) - 1, segments_per_chunk):
+        block = coords[i:i + segments_per_chunk + 1]
+        inner = inner_points(block[:-1], block[1:], max_distance_per_point)
+        if len(inner):
+            yield inner
+        await asyncio.sleep(0)  # Let the elevation requests progress between chunks
+    yield coords[-1:]
+
+
+# Regroup the densified chunks into elevation batches, keep at most `max_in_flight` batches
+# requested at once and yield (points, elevations) in route order as the batches resolve.
+# `get_elevations` is an async callable taking a list of (lon, lat) points, like fetch_elevations.
+async def elevation_batches(chunks, get_elevations, batch_size=100, max_in_flight=4):
+    pending = deque()
+    buffer = np.empty((0, 2))
+
+    async def request(points):
+        return points, await get_elevations(points.tolist())
+
+    try:
+        async for chunk in chunks:
+            buffer = np.concatenate((buffer, chunk))
+            while len(buffer) >= batch_size:
+                pending.append(asyncio.ensure_future(request(buffer[:batch_size])))
+                buffer = buffer[batch_size:]
+                if len(pending) >= max_in_flight:
+                    yield await pending.popleft()
+
+        if len(buffer):
+            pending.append(asyncio.ensure_future(request(buffer)))
+        while pending:
+            yield await pending.popleft()
+    finally:
+        # The consumer stopped early: do not leave requests running in the background
+        for task in pending:
+            task.cancel()
+
+
+# Fuel, distance and height-accuracy totals updated batch by batch. Missing heights are filled as in
+# quote_route (fill_elevation_gaps): interpolated between the known heights around them, the nearest
+# known height before the first / after the last one. Points after the last known height are held
+# back until the next known height (or the end of the route) settles them, so the fuel covers the
+# route up to the last settled point and memory grows only with the longest run of missing heights.
+class RunningEstimate:
+    def __init__(self, base_fuel_consumption):
+        self.base_fuel_consumption = base_fuel_consumption
+        # Points not settled yet, starting with the last settled one, and the segments between them
+        self.heights = np.empty(0)
+        self.cumulative_km = np.empty(0)
+        self.distances = np.empty(0)
+        self.distance_km = 0.0
+        self.fuel_consumption = 0.0
+        self.total_heights = 0
+        self.none_count = 0
+        self.complete = False
+        self.last_point = None
+
+    def update(self, points, elevations):
+        heights = np.array(elevations, dtype=np.float64)  # None becomes NaN
+        self.total_heights += len(heights)
+        self.none_count += int(np.isnan(heights).sum())
+
+        # The previous batch's last point starts the first segment of this batch
+        if self.last_point is not None:
+            distances = segment_distances(np.concatenate((self.last_point, points)))
+            cumulative_km = self.distance_km + np.cumsum(distances)
+        else:
+            distances = segment_distances(points)
+            cumulative_km = np.concatenate(([0.0], np.cumsum(distances)))
+        self.last_point = points[-1:]
+        self.distance_km += float(distances.sum())
+
+        self.heights = np.concatenate((self.heights, heights))
+        self.cumulative_km = np.concatenate((self.cumulative_km, cumulative_km))
+        self.distances = np.concatenate((self.distances, distances))
+        self.settle()
+
+    # Fill the gaps and count the fuel up to the last known height, to the end of the route when `final`
+    def settle(self, final=False):
+        if final:
+            self.complete = True
+            end = len(self.heights) - 1
+        else:
+            known = np.flatnonzero(~np.isnan(self.heights))
+            end = known[-1] if len(known) else 0
+        if end <= 0:
+            return
+
+        heights, _ = fill_elevation_gaps(self.heights[:end + 1], self.cumulative_km[:end + 1])
+        fuel, _ = calculate_fuel_profile(heights, self.distances[:end], self.base_fuel_consumption)
+        self.fuel_consumption += fuel
+        self.heights = np.concatenate((heights[end:end + 1], self.heights[end + 1:]))
+        self.cumulative_km = self.cumulative_km[end:]
+        self.distances = self.distances[end:]
+
+    def snapshot(self):
+        accuracy = (self.total_heights - self.none_count) / self.total_heights * 100 if self.total_heights else 0
+        return {
+            "points": self.total_heights,
+            "distance_miles": self.distance_km * MILES_PER_KILOMETER,
+            "fuel_consumption": self.fuel_consumption,
+            "missing_heights": self.none_count,
+            "height_accuracy": accuracy,
+            "complete": self.complete,
+        }
+
+
+# Streaming quote: yields the running estimate after every elevation batch, memory stays bounded
+# by the chunk size and the batches in flight however long the route is. The last estimate
+# ("complete") covers the whole route.
+async def stream_estimates(route, get_elevations, base_fuel_consumption, max_distance_per_point=0.1,
+                           batch_size=100, max_in_flight=4):
+    estimate = RunningEstimate(base_fuel_consumption)
+    chunks = densified_chunks(route, max_distance_per_point)
+    async for points, elevations in elevation_batches(chunks, get_elevations, batch_size, max_in_flight):
+        estimate.update(points, elevations)
+        yield estimate.snapshot()
+    estimate.settle(final=True)
+    yield estimate.snapshot()
@@ -0,0 +1,162 @@
+import argparse
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+from fuel import terrain_factors, MILES_PER_KILOMETER
+from main import BASE_FUEL_CONSUMPTION, FUEL_COST_PER_GALLON
+
+# Profit margins of calculate_price: up to 500 miles, 501-1500 miles, above (and the 500-501 gap)
+PROFIT_MARGINS = (0.15, 0.10, 0.05)
+
+
+# Terrain profiles of quoted lanes (SQLite): the segment distances (km) and fuel consumption factors
+# of the densified route, as float32 arrays, and the number of points without a fetched elevation.
+# Everything a quote needs besides the vehicle, fuel and margin parameters, so re-pricing needs no
+# routing and no elevation requests.
+class ProfileStore:
+    def __init__(self, path="terrain_profiles.sqlite"):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS profiles (origin TEXT NOT NULL, destination TEXT NOT NULL, "
+            "distances BLOB NOT NULL, factors BLOB NOT NULL, created_at REAL NOT NULL, "
+            "missing_heights INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (origin, destination))"
+        )
+        # Stores written before missing_heights was kept count every height as fetched
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(profiles)")]
+        if "missing_heights" not in columns:
+            self.connection.execute("ALTER TABLE profiles ADD COLUMN missing_heights INTEGER NOT NULL DEFAULT 0")
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def put(self, origin, destination, segment_distances_km, factors, missing_heights=0):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO profiles (origin, destination, distances, factors, created_at, missing_heights) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (origin, destination, np.asarray(segment_distances_km, dtype="<f4").tobytes(),
+             np.asarray(factors, dtype="<f4").tobytes(), time.time(), int(missing_heights)),
+        )
+        self.connection.commit()
+
+    # Profile of a quote (as returned by main.quote_route)
+    def put_quote(self, origin, destination, quote):
+        distances = quote["segment_distances"]
+        self.put(origin, destination, distances, terrain_factors(quote["elevations"], distances),
+                 quote["missing_heights"])
+
+    # (segment distances in km, factors), None when the lane has no profile
+    def get(self, origin, destination):
+        row = self.connection.execute(
+            "SELECT distances, factors FROM profiles WHERE origin = ? AND destination = ?", (origin, destination)
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype="<f4"), np.frombuffer(row[1], dtype="<f4")
+
+    # All profiles reduced to the totals pricing needs, see LaneBook
+    def load_book(self):
+        lanes, distance_miles, effective_miles, points, missing_heights = [], [], [], [], []
+        for origin, destination, distances, factors, missing in self.connection.execute(
+                "SELECT origin, destination, distances, factors, missing_heights FROM profiles "
+                "ORDER BY origin, destination"):
+            miles = np.frombuffer(distances, dtype="<f4").astype(np.float64) * MILES_PER_KILOMETER
+            lanes.append((origin, destination))
+            distance_miles.append(miles.sum())
+            # Fuel is linear in the base consumption: one dot product per lane, done once
+            effective_miles.append(np.dot(np.frombuffer(factors, dtype="<f4").astype(np.float64), miles))
+            points.append(len(miles) + 1)  # One segment between consecutive points
+            missing_heights.append(missing)
+        return LaneBook(lanes, distance_miles, effective_miles, points, missing_heights)
+
+    def close(self):
+        self.connection.close()
+
+
+# Lanes with their distance and terrain-weighted ("effective") distance in miles, re-priced for
+# any fuel price, base consumption (one value or one per lane) and margin tiers with array arithmetic.
+# Gives the same numbers as quote_route (calculate_price and calculator) for the same parameters.
+# `points` and `missing_heights` (per lane) give the height accuracy of the quotes.
+class LaneBook:
+    def __init__(self, lanes, distance_miles, effective_miles, points, missing_heights):
+        self.lanes = list(lanes)
+        self.distance_miles = np.asarray(distance_miles, dtype=np.float64)
+        self.effective_miles = np.asarray(effective_miles, dtype=np.float64)
+        self.points = np.asarray(points, dtype=np.int64)
+        self.missing_heights = np.asarray(missing_heights, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.lanes)
+
+    def reprice(self, base_fuel_consumption=BASE_FUEL_CONSUMPTION, fuel_cost_per_gallon=FUEL_COST_PER_GALLON,
+                margins=PROFIT_MARGINS):
+        distance = self.distance_miles
+        fuel_consumption = np.asarray(base_fuel_consumption, dtype=np.float64) * self.effective_miles / 100
+        fuel_cost = fuel_consumption * fuel_cost_per_gallon
+
+        # calculate_price
+        short, medium, long = margins
+        margin = np.select([distance <= 500, (distance >= 501) & (distance <= 1500)], [short, medium], long)
+        price = fuel_cost * (1 + margin)
+
+        # calculator: drivers' days at 60 mph and 11 hours a day, fuel for a round trip, 75% of the total
+        driver_work_days = np.ceil(distance * 2 / 60 / 11)
+        total_cost = np.round(((20 * 11) * driver_work_days + fuel_cost * 2) * 0.75).astype(np.int64)
+        return {
+            "distance_miles": distance,
+            "fuel_consumption": fuel_consumption,
+            "fuel_cost": fuel_cost,
+            "price": price,
+            "total_cost": total_cost,
+        }
+
+    # One dict per lane with the fields of main.quote_summary
+    def quotes(self, **pricing):
+        prices = self.reprice(**pricing)
+        height_accuracy = (self.points - self.missing_heights) / np.maximum(self.points, 1) * 100
+        return [
+            {
+                "origin": origin,
+                "destination": destination,
+                "distance_miles": round(float(prices["distance_miles"][i]), 2),
+                "points": int(self.points[i]),
+                "fuel_consumption": round(float(prices["fuel_consumption"][i]), 2),
+                "fuel_cost": round(float(prices["fuel_cost"][i]), 2),
+                "price": round(float(prices["price"][i]), 2),
+                "total_cost": int(prices["total_cost"][i]),
+                "height_accuracy": round(float(height_accuracy[i]), 2),
+            }
+            for i, (origin, destination) in enumerate(self.lanes)
+        ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-price every stored lane profile (no routing, no elevations)")
+    parser.add_argument("profiles", nargs="?", default="terrain_profiles.sqlite", help="Profile store file")
+    parser.add_argument("--output", help="JSONL file for the quotes (default: summary only)")
+    parser.add_argument("--base-fuel-consumption", type=float, default=BASE_FUEL_CONSUMPTION,
+                        help="Gallons per 100 miles")
+    parser.add_argument("--fuel-price", type=float, default=FUEL_COST_PER_GALLON, help="Price per gallon in $")
+    parser.add_argument("--margins", type=float, nargs=3, default=PROFIT_MARGINS, metavar=("SHORT", "MEDIUM", "LONG"),
+                        help="Profit margins up to 500 miles, up to 1500 miles and above")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    store = ProfileStore(args.profiles)
+    start_time = time.perf_counter()
+    book = store.load_book()
+    loaded = time.perf_counter()
+    quotes = book.quotes(base_fuel_consumption=args.base_fuel_consumption, fuel_cost_per_gallon=args.fuel_price,
+                         margins=tuple(args.margins))
+    priced = time.perf_counter()
+    store.close()
+
+    if args.output:
+        with open(args.output, "w") as output:
+            for quote in quotes:
+                output.write(json.dumps(quote) + "\n")
+    print(f"Re-priced {len(book)} lanes: loaded in {loaded - start_time:.3f} s, priced in {priced - loaded:.3f} s")
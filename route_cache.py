@@ -0,0 +1,74 @@
+import sqlite3
+import time
+
+import numpy as np
+
+COORDINATE_SCALE = 1_000_000  # OSRM GeoJSON coordinates have 6 decimals, stored as int32 micro-degrees
+KEY_PRECISION = 4  # Origin/destination rounded to 4 decimals (~11 m) for the cache key
+
+
+# Cache key of a lane: origin and destination ('latitude,longitude') rounded to KEY_PRECISION
+def route_key(start, end):
+    points = []
+    for point in (start, end):
+        lat, lon = (round(float(value), KEY_PRECISION) for value in point.split(","))
+        points.append(f"{lat:.{KEY_PRECISION}f},{lon:.{KEY_PRECISION}f}")
+    return ";".join(points)
+
+
+# Pack [[lon, lat], ...] into int32 micro-degrees: 8 bytes per point, exact for 6-decimal coordinates
+def pack_geometry(coordinates):
+    return np.round(np.asarray(coordinates, dtype=np.float64) * COORDINATE_SCALE).astype("<i4").tobytes()
+
+
+def unpack_geometry(blob):
+    return np.frombuffer(blob, dtype="<i4").reshape(-1, 2) / COORDINATE_SCALE
+
+
+# OSRM route cache (SQLite) with packed geometries. Entries older than `ttl` seconds are dropped,
+# so road changes are picked up again.
+class RouteCache:
+    def __init__(self, path="route_cache.sqlite", ttl=7 * 24 * 3600):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, geometry BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+
+    # Route coordinates of the lane, None when it is not cached (or expired)
+    def get(self, start, end):
+        row = self.connection.execute(
+            "SELECT geometry FROM routes WHERE key = ? AND created_at >= ?", (route_key(start, end), self.expiry())
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return unpack_geometry(row[0]).tolist()
+
+    def put(self, start, end, coordinates):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO routes (key, geometry, created_at) VALUES (?, ?, ?)",
+            (route_key(start, end), pack_geometry(coordinates), time.time()),
+        )
+        self.evict_expired()
+        self.connection.commit()
+
+    def expiry(self):
+        return time.time() - self.ttl
+
+    def evict_expired(self):
+        self.connection.execute("DELETE FROM routes WHERE created_at < ?", (self.expiry(),))
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total > 0 else 0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": hit_rate, "entries": len(self)}
+
+    def close(self):
+        self.connection.close()
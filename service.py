@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import bisect
+import time
+
+from aiohttp import web
+
+from client import HttpClient
+from elevation import OpenTopoDataProvider, PUBLIC_API_RATE
+from elevation_cache import ElevationCache
+from instrumentation import recorder
+from main import quote_lane, quote_summary, BASE_FUEL_CONSUMPTION, FUEL_COST_PER_GALLON
+from route_cache import RouteCache
+
+# Upper bounds of the latency histogram buckets, in seconds (the last bucket is unbounded)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+# Latency histogram with fixed buckets
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def to_dict(self):
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {"buckets": dict(zip(bounds, self.counts)), "count": self.count, "sum": self.total}
+
+
+# Quoting service: route -> elevation -> fuel -> price over one shared HTTP client.
+# Identical quotes requested while one is being computed wait for that computation
+# instead of starting their own.
+class QuoteService:
+    def __init__(self, client, provider=None, cache=None, route_cache=None):
+        self.client = client
+        self.provider = provider if provider is not None else OpenTopoDataProvider(client=client)
+        self.cache = cache
+        self.route_cache = route_cache
+        self.in_flight = {}
+        self.histograms = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    async def compute(self, origin, destination, adaptive, base_fuel_consumption, fuel_cost_per_gallon):
+        timings = {}
+        start_time = time.perf_counter()
+        quote = await quote_lane(origin, destination, client=self.client, cache=self.cache, provider=self.provider,
+                                 route_cache=self.route_cache, adaptive=adaptive, timings=timings,
+                                 base_fuel_consumption=base_fuel_consumption,
+                                 fuel_cost_per_gallon=fuel_cost_per_gallon)
+        timings["total"] = time.perf_counter() - start_time
+        for stage, seconds in timings.items():
+            self.histograms.setdefault(stage, LatencyHistogram()).observe(seconds)
+        return quote_summary(quote) if quote is not None else None
+
+    async def quote(self, origin, destination, adaptive=False, base_fuel_consumption=BASE_FUEL_CONSUMPTION,
+                    fuel_cost_per_gallon=FUEL_COST_PER_GALLON):
+        self.requests += 1
+        key = (origin, destination, adaptive, base_fuel_consumption, fuel_cost_per_gallon)
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.compute(*key))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A client that disconnects must not cancel the computation the others are waiting for
+        return await asyncio.shield(task)
+
+    def metrics(self):
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+            "latency_seconds": {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+        }
+
+
+# A point of a lane is a ZIP code or 'latitude,longitude'
+def is_location(point):
+    if point.isdigit():
+        return True
+    parts = point.split(",")
+    if len(parts) != 2:
+        return False
+    try:
+        latitude, longitude = (float(part) for part in parts)
+    except ValueError:
+        return False
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+SERVICE_KEY = web.AppKey("service", QuoteService)
+OWNS_SERVICE_KEY = web.AppKey("owns_service", bool)
+
+
+async def handle_quote(request):
+    service = request.app[SERVICE_KEY]
+    query = request.query
+    if "origin" not in query or "destination" not in query:
+        raise web.HTTPBadRequest(text="origin and destination are required")
+    try:
+        base_fuel_consumption = float(query.get("base_fuel_consumption", BASE_FUEL_CONSUMPTION))
+        fuel_cost_per_gallon = float(query.get("fuel_price", FUEL_COST_PER_GALLON))
+    except ValueError:
+        raise web.HTTPBadRequest(text="base_fuel_consumption and fuel_price must be numbers")
+    adaptive = query.get("adaptive", "0").lower() in ("1", "true", "yes")
+
+    origin, destination = query["origin"].strip(), query["destination"].strip()
+    if not is_location(origin) or not is_location(destination):
+        raise web.HTTPBadRequest(text="origin and destination must be ZIP codes or 'latitude,longitude'")
+    result = await service.quote(origin, destination, adaptive, base_fuel_consumption, fuel_cost_per_gallon)
+    if result is None:
+        raise web.HTTPNotFound(text="Failed to get the route")
+    return web.json_response({"origin": origin, "destination": destination, **result})
+
+
+# JSON metrics of the service, or the recorded spans in the Prometheus text format with ?format=prometheus
+async def handle_metrics(request):
+    if request.query.get("format") == "prometheus":
+        return web.Response(text=recorder.to_prometheus(), content_type="text/plain")
+    metrics = request.app[SERVICE_KEY].metrics()
+    if recorder.enabled:
+        metrics["spans"] = recorder.summary()
+    return web.json_response(metrics)
+
+
+# Web application around a QuoteService. Without a service one is created on startup
+# (with its own HTTP client and caches) and closed on cleanup.
+def make_app(service=None, cache_path="elevation_cache.sqlite", route_cache_path="route_cache.sqlite",
+             requests_per_second=PUBLIC_API_RATE):
+    app = web.Application()
+    app[SERVICE_KEY] = service
+
+    async def start_service(app):
+        if app[SERVICE_KEY] is None:
+            client = await HttpClient().start()
+            cache = ElevationCache(cache_path) if cache_path else None
+            provider = OpenTopoDataProvider(requests_per_second=requests_per_second, client=client, checkpoint=cache)
+            route_cache = RouteCache(route_cache_path) if route_cache_path else None
+            app[SERVICE_KEY] = QuoteService(client, provider, cache, route_cache)
+            app[OWNS_SERVICE_KEY] = True
+
+    async def stop_service(app):
+        if app.get(OWNS_SERVICE_KEY):
+            service = app[SERVICE_KEY]
+            await service.client.close()
+            for cache in (service.cache, service.route_cache):
+                if cache is not None:
+                    cache.close()
+
+    app.on_startup.append(start_service)
+    app.on_cleanup.append(stop_service)
+    app.router.add_get("/quote", handle_quote)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP quoting service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests-per-second", type=float, default=PUBLIC_API_RATE,
+                        help="Elevation API budget shared by all quotes")
+    parser.add_argument("--cache", default="elevation_cache.sqlite", help="Elevation cache file, '' to disable")
+    parser.add_argument("--route-cache", default="route_cache.sqlite", help="Route cache file, '' to disable")
+    parser.add_argument("--trace", action="store_true", help="Record stage spans (p50/p95/p99) for /metrics")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    recorder.enabled = recorder.enabled or args.trace
+    web.run_app(make_app(cache_path=args.cache, route_cache_path=args.route_cache,
+                         requests_per_second=args.requests_per_second), host=args.host, port=args.port)
@@ -0,0 +1,95 @@
+import numpy as np
+
+METERS_PER_DEGREE = 111_320  # Length of one degree of latitude (and of longitude at the equator)
+
+
+# Grid index of known elevation samples (every fetched route point): a point within `radius_m`
+# meters of a sample reuses its elevation, so routes sharing a corridor (I-80, I-70, ...) fetch
+# only the points of their new segments. The grid cells are `radius_m` wide in degrees of
+# latitude, one sample is kept per cell, and a lookup checks the cells around each point.
+class SpatialElevationIndex:
+    def __init__(self, radius_m=30.0):
+        self.radius_m = radius_m
+        self.cell_size = radius_m / METERS_PER_DEGREE
+        # Sorted cell keys and the sample of every cell
+        self.keys = np.empty(0, dtype=np.int64)
+        self.lons = np.empty(0, dtype=np.float64)
+        self.lats = np.empty(0, dtype=np.float64)
+        self.elevations = np.empty(0, dtype=np.float64)
+        self.hits = 0
+        self.misses = 0
+
+    # Index built from every point of an ElevationCache
+    @classmethod
+    def from_cache(cls, cache, radius_m=30.0):
+        index = cls(radius_m)
+        coordinates, elevations = cache.items()
+        index.add(coordinates, elevations)
+        return index
+
+    def __len__(self):
+        return len(self.keys)
+
+    def cells(self, lon, lat):
+        return (np.floor((lon + 180) / self.cell_size).astype(np.int64),
+                np.floor((lat + 90) / self.cell_size).astype(np.int64))
+
+    @staticmethod
+    def pack(lon_cell, lat_cell):
+        return (lat_cell << 32) | lon_cell
+
+    # Add (lon, lat) samples, points without an elevation (None / NaN) and cells that already have
+    # a sample are skipped
+    def add(self, coordinates, elevations):
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        heights = np.array(elevations, dtype=np.float64).reshape(-1)  # None becomes NaN
+        known = ~np.isnan(heights)
+        coords, heights = coords[known], heights[known]
+        keys = self.pack(*self.cells(coords[:, 0], coords[:, 1]))
+
+        keys, first = np.unique(keys, return_index=True)
+        new = ~np.isin(keys, self.keys, assume_unique=True)
+        keys, first = keys[new], first[new]
+        if not len(keys):
+            return
+
+        # Merge into the sorted arrays in one pass (no re-sorting of the whole index)
+        positions = np.searchsorted(self.keys, keys)
+        self.keys = np.insert(self.keys, positions, keys)
+        self.lons = np.insert(self.lons, positions, coords[first, 0])
+        self.lats = np.insert(self.lats, positions, coords[first, 1])
+        self.elevations = np.insert(self.elevations, positions, heights[first])
+
+    # Elevation of the nearest sample within radius_m of every (lon, lat) point, None where there is none
+    def lookup(self, coordinates):
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        lon, lat = coords[:, 0], coords[:, 1]
+        best_distance = np.full(len(coords), np.inf)
+        found = np.full(len(coords), np.nan)
+
+        if len(self.keys) and len(coords):
+            lon_cell, lat_cell = self.cells(lon, lat)
+            meters_per_lon = METERS_PER_DEGREE * np.cos(np.radians(lat))
+            # Cells are narrower than radius_m in the east-west direction away from the equator
+            lon_reach = int(np.ceil(1 / max(np.cos(np.radians(np.abs(lat).max())), 1e-6)))
+            for d_lat in (-1, 0, 1):
+                for d_lon in range(-lon_reach, lon_reach + 1):
+                    keys = self.pack(lon_cell + d_lon, lat_cell + d_lat)
+                    positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+                    match = self.keys[positions] == keys
+                    dx = (self.lons[positions] - lon) * meters_per_lon
+                    dy = (self.lats[positions] - lat) * METERS_PER_DEGREE
+                    distance = np.where(match, np.hypot(dx, dy), np.inf)
+                    closer = (distance <= self.radius_m) & (distance < best_distance)
+                    best_distance[closer] = distance[closer]
+                    found[closer] = self.elevations[positions[closer]]
+
+        hits = int((~np.isnan(found)).sum())
+        self.hits += hits
+        self.misses += len(coords) - hits
+        return [None if np.isnan(height) else float(height) for height in found]
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total > 0 else 0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": hit_rate, "samples": len(self)}
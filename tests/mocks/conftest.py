@@ -0,0 +1,12 @@
+from unittest import mock
+
+import pytest
+
+from geocode import ZipGeocoder
+
+
+# Every test starts without a local ZIP index and without memoized Nominatim answers
+@pytest.fixture(autouse=True)
+def fresh_zip_geocoder():
+    with mock.patch("main.zip_geocoder", ZipGeocoder(index_path=None)) as geocoder:
+        yield geocoder
@@ -0,0 +1,87 @@
+import asyncio
+
+from aiohttp import web
+
+from main import haversine
+
+# ZIP code -> (lat, lon) known by the fake Nominatim
+ZIP_CODES = {
+    "90012": (34.053691, -118.242766),  # LA
+    "80202": (39.739236, -104.984862),  # Denver
+    "60602": (41.878113, -87.629799),  # Chicago
+    "10007": (40.712776, -74.005974),  # NY
+}
+
+
+# Straight OSRM-like geometry between two points, [lon, lat] pairs
+def straight_route(start_lon, start_lat, end_lon, end_lat, num_points=20):
+    return [[start_lon + (end_lon - start_lon) * i / (num_points - 1),
+             start_lat + (end_lat - start_lat) * i / (num_points - 1)] for i in range(num_points)]
+
+
+# Synthetic terrain used by the fake opentopodata
+def fake_elevation(lon, lat):
+    return round(1000 + 300 * ((lat * 7) % 1) + 200 * ((lon * 3) % 1), 1)
+
+
+# Local stand-ins for OSRM, Nominatim and opentopodata in one aiohttp app.
+# `stats` (a dict filled in place) counts requests per service and the client connections seen by the server.
+def make_services_app(delay=0.0, stats=None):
+    stats = stats if stats is not None else {}
+    stats.setdefault("requests", {"route": 0, "table": 0, "search": 0, "elevation": 0})
+    stats.setdefault("connections", set())
+
+    def track(request, service):
+        stats["requests"][service] += 1
+        stats["connections"].add(request.transport.get_extra_info("peername"))
+
+    async def route(request):
+        track(request, "route")
+        await asyncio.sleep(delay)
+        points = [tuple(map(float, point.split(","))) for point in request.match_info["coordinates"].split(";")]
+        # One straight leg between consecutive waypoints, split into two steps (plus the arrival step)
+        legs = [straight_route(*start, *end) for start, end in zip(points, points[1:])]
+        coordinates = legs[0] + [point for leg in legs[1:] for point in leg[1:]]
+        body = {"code": "Ok", "routes": [{"geometry": {"coordinates": coordinates}}]}
+        if request.query.get("steps") == "true":
+            body["routes"][0]["legs"] = [{"steps": [
+                {"geometry": {"coordinates": leg[:10]}},
+                {"geometry": {"coordinates": leg[9:]}},
+                {"geometry": {"coordinates": [leg[-1], leg[-1]]}},
+            ]} for leg in legs]
+        return web.json_response(body)
+
+    # Road distance (great circle * 1.2) and duration (at 100 km/h) of every source/destination pair
+    async def table(request):
+        track(request, "table")
+        await asyncio.sleep(delay)
+        points = [tuple(map(float, point.split(","))) for point in request.match_info["coordinates"].split(";")]
+        sources = [int(i) for i in request.query["sources"].split(";")]
+        destinations = [int(i) for i in request.query["destinations"].split(";")]
+        distances = [[haversine(points[i][1], points[i][0], points[j][1], points[j][0]) * 1200 for j in destinations]
+                     for i in sources]
+        durations = [[distance / 1000 * 36 for distance in row] for row in distances]
+        return web.json_response({"code": "Ok", "distances": distances, "durations": durations})
+
+    async def search(request):
+        track(request, "search")
+        await asyncio.sleep(delay)
+        zip_code = request.query["postalcode"]
+        if zip_code not in ZIP_CODES:
+            return web.json_response([])
+        lat, lon = ZIP_CODES[zip_code]
+        return web.json_response([{"lat": str(lat), "lon": str(lon), "display_name": f"ZIP {zip_code}"}])
+
+    async def elevation(request):
+        track(request, "elevation")
+        await asyncio.sleep(delay)
+        points = [location.split(",") for location in request.query["locations"].split("|")]
+        results = [{"elevation": fake_elevation(float(lon), float(lat))} for lat, lon in points]
+        return web.json_response({"results": results})
+
+    app = web.Application()
+    app.router.add_get("/route/v1/driving/{coordinates}", route)
+    app.router.add_get("/table/v1/driving/{coordinates}", table)
+    app.router.add_get("/search", search)
+    app.router.add_get("/v1/ned10m", elevation)
+    return app
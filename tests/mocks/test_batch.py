@@ -0,0 +1,58 @@
+import io
+import json
+from unittest import mock
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from batch import read_lanes, quote_lanes
+from client import HttpClient
+from elevation import OpenTopoDataProvider
+from fake_services import make_services_app
+
+
+def test_read_lanes_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "lanes.csv"
+    csv_path.write_text('origin,destination\n90012,80202\n"41.878113,-87.629799","40.712776,-74.005974"\n')
+    jsonl_path = tmp_path / "lanes.jsonl"
+    jsonl_path.write_text('{"origin": "90012", "destination": "80202"}\n\n{"origin": 60602, "destination": 10007}\n')
+
+    assert read_lanes(csv_path) == [("90012", "80202"), ("41.878113,-87.629799", "40.712776,-74.005974")]
+    assert read_lanes(jsonl_path) == [("90012", "80202"), ("60602", "10007")]
+
+
+@pytest.mark.asyncio
+async def test_quote_lanes_streams_results():
+    # ZIP codes, coordinates and mixed lanes (each side is resolved on its own)
+    lanes = [("90012", "80202"), ("60602", "10007"), ("41.878113,-87.629799", "39.739236,-104.984862"),
+             ("34.053691,-118.242766", "80202"), ("90012", "39.739236,-104.984862"), ("00000", "80202")]
+    stats = {}
+    output = io.StringIO()
+    map_routes = []
+
+    async with TestServer(make_services_app(delay=0.01, stats=stats)) as server:
+        base_url = str(server.make_url("")).rstrip("/")
+        async with HttpClient() as client:
+            provider = OpenTopoDataProvider(requests_per_second=1000, url=f"{base_url}/v1/ned10m", client=client)
+            with mock.patch("main.OSRM_URL", base_url), mock.patch("main.NOMINATIM_URL", base_url):
+                summary = await quote_lanes(lanes, output, parallelism=4, client=client, provider=provider,
+                                            map_routes=map_routes)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(results) == len(lanes)
+    assert {(result["origin"], result["destination"]) for result in results} == set(lanes)
+
+    failed = [result for result in results if "error" in result]
+    assert [(result["origin"], result["error"]) for result in failed] == [("00000", "Failed to get the route")]
+    for result in results:
+        if "error" not in result:
+            assert result["distance_miles"] > 0
+            assert result["fuel_consumption"] > 0
+            assert result["total_cost"] > 0
+
+    assert summary["lanes"] == 6
+    assert summary["failed"] == 1
+    assert summary["lanes_per_second"] > 0
+    assert len(stats["connections"]) <= HttpClient().limit_per_host
+    assert sorted(label for label, _ in map_routes) == sorted(f"{origin} -> {destination}"
+                                                              for origin, destination in lanes[:5])
@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from elevation import ElevationScheduler, TokenBucket
+
+RESPONSE_DELAY = 0.2  # Simulated latency of the elevation API, seconds
+
+
+# Local stand-in for opentopodata: elevation = lat * 100, the first request for a
+# latitude listed in `fail_once` answers 429
+def make_elevation_app(fail_once=()):
+    failed = set()
+
+    async def handler(request):
+        await asyncio.sleep(RESPONSE_DELAY)
+        points = [location.split(",") for location in request.query["locations"].split("|")]
+        first_lat = float(points[0][0])
+        if first_lat in fail_once and first_lat not in failed:
+            failed.add(first_lat)
+            return web.json_response({"status": "ERROR"}, status=429)
+        return web.json_response({"results": [{"elevation": float(lat) * 100} for lat, lon in points]})
+
+    app = web.Application()
+    app.router.add_get("/v1/ned10m", handler)
+    return app
+
+
+def make_coordinates(num_points):
+    return [(-100.0, i / 1000) for i in range(num_points)]
+
+
+async def fetch_with(server, coordinates, **scheduler_options):
+    scheduler = ElevationScheduler(url=str(server.make_url("/v1/ned10m")), **scheduler_options)
+    async with aiohttp.ClientSession() as session:
+        start_time = time.perf_counter()
+        elevations = await scheduler.fetch(session, coordinates, batch_size=10)
+        return elevations, time.perf_counter() - start_time
+
+
+@pytest.mark.asyncio
+async def test_results_keep_route_order_and_retry_429():
+    coordinates = make_coordinates(95)
+    async with TestServer(make_elevation_app(fail_once={0.02, 0.05})) as server:
+        elevations, _ = await fetch_with(server, coordinates, requests_per_second=100, max_concurrency=4,
+                                         backoff=0.01)
+
+    assert elevations == pytest.approx([lat * 100 for lon, lat in coordinates])
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_keeps_alignment():
+    coordinates = make_coordinates(30)
+    async with TestServer(make_elevation_app(fail_once={0.01})) as server:
+        elevations, _ = await fetch_with(server, coordinates, requests_per_second=100, max_retries=0,
+                                         recovery_rounds=0)
+
+    assert len(elevations) == len(coordinates)
+    assert elevations[10:20] == [None] * 10
+    assert elevations[20] == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetch_is_faster_than_sequential():
+    coordinates = make_coordinates(80)
+    async with TestServer(make_elevation_app()) as server:
+        sequential, sequential_time = await fetch_with(server, coordinates, requests_per_second=100,
+                                                       max_concurrency=1)
+        concurrent, concurrent_time = await fetch_with(server, coordinates, requests_per_second=100,
+                                                       max_concurrency=8)
+
+    print(f"sequential {sequential_time:.2f} s, concurrent {concurrent_time:.2f} s")
+    assert concurrent == sequential
+    assert sequential_time >= 8 * RESPONSE_DELAY
+    assert concurrent_time < sequential_time / 2
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20)
+    start_time = time.perf_counter()
+    for _ in range(6):
+        await bucket.acquire()
+    # The first token is available at once, the next five arrive every 1/20 s
+    assert time.perf_counter() - start_time >= 5 / 20 * 0.9
+
+
+# Stand-in answering the batches starting at the latitudes of `failures` with the listed bad
+# responses first ("short": one result missing, "html": not JSON, "429"), then correctly
+def make_flaky_app(failures, requests):
+    failures = {lat: list(kinds) for lat, kinds in failures.items()}
+
+    async def handler(request):
+        points = [location.split(",") for location in request.query["locations"].split("|")]
+        first_lat = float(points[0][0])
+        requests.append(first_lat)
+        results = [{"elevation": float(lat) * 100} for lat, lon in points]
+        kind = failures.get(first_lat, []).pop(0) if failures.get(first_lat) else None
+        if kind == "short":
+            return web.json_response({"results": results[1:]})
+        if kind == "html":
+            return web.Response(text="<html>Bad gateway</html>", content_type="text/html")
+        if kind == "429":
+            return web.json_response({"status": "ERROR"}, status=429)
+        return web.json_response({"results": results})
+
+    app = web.Application()
+    app.router.add_get("/v1/ned10m", handler)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_invalid_responses_are_retried():
+    coordinates = make_coordinates(30)
+    requests = []
+    async with TestServer(make_flaky_app({0.0: ["short"], 0.01: ["html"]}, requests)) as server:
+        elevations, _ = await fetch_with(server, coordinates, requests_per_second=100, backoff=0.01)
+
+    assert elevations == pytest.approx([lat * 100 for lon, lat in coordinates])
+    assert sorted(requests) == [0.0, 0.0, 0.01, 0.01, 0.02]
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_fetched_again_and_checkpointed():
+    coordinates = make_coordinates(40)
+    requests = []
+    checkpoints = []
+    scheduler_options = {"requests_per_second": 100, "max_retries": 1, "backoff": 0.01, "recovery_delay": 0.05}
+    async with TestServer(make_flaky_app({0.02: ["429", "html"]}, requests)) as server:
+        scheduler = ElevationScheduler(url=str(server.make_url("/v1/ned10m")), **scheduler_options)
+        async with aiohttp.ClientSession() as session:
+            elevations = await scheduler.fetch(session, coordinates, batch_size=10,
+                                               on_batch=lambda batch, heights: checkpoints.append(batch[0][1]))
+
+    assert elevations == pytest.approx([lat * 100 for lon, lat in coordinates])
+    # Two failed attempts, then only the failed batch is requested again in the recovery round
+    assert sorted(requests) == [0.0, 0.01, 0.02, 0.02, 0.02, 0.03]
+    assert requests[-1] == 0.02
+    assert sorted(checkpoints) == [0.0, 0.01, 0.02, 0.03] and checkpoints[-1] == 0.02
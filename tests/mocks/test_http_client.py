@@ -0,0 +1,56 @@
+from unittest import mock
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from client import HttpClient
+from elevation import OpenTopoDataProvider
+from fake_services import make_services_app
+from main import get_route_by_zip, fetch_elevations
+
+
+async def quote_elevations(server, client=None):
+    base_url = str(server.make_url("")).rstrip("/")
+    with mock.patch("main.OSRM_URL", base_url), mock.patch("main.NOMINATIM_URL", base_url):
+        route = await get_route_by_zip("90012", "80202", client=client)
+    provider = OpenTopoDataProvider(batch_size=5, requests_per_second=100, url=f"{base_url}/v1/ned10m",
+                                    client=client)
+    return await fetch_elevations(route, provider=provider)
+
+
+@pytest.mark.asyncio
+async def test_shared_client_reuses_one_connection():
+    stats = {}
+    async with TestServer(make_services_app(stats=stats)) as server:
+        async with HttpClient(limit_per_host=1) as client:
+            elevations = await quote_elevations(server, client)
+            assert not client.session.closed
+
+    assert len(elevations) == 20
+    assert stats["requests"] == {"route": 1, "table": 0, "search": 2, "elevation": 4}
+    assert len(stats["connections"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_without_client_every_call_opens_a_connection():
+    stats = {}
+    async with TestServer(make_services_app(stats=stats)) as server:
+        await quote_elevations(server)
+
+    # Two geocode sessions, one route session and one elevation session
+    assert len(stats["connections"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_client_can_be_restarted():
+    client = HttpClient()
+    await client.start()
+    session = client.session
+    await client.start()
+    assert client.session is session
+
+    await client.close()
+    assert client.session is None
+    await client.start()
+    assert not client.session.closed
+    await client.close()
@@ -0,0 +1,176 @@
+import asyncio
+import contextlib
+import io
+from unittest import mock
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestServer
+
+from client import HttpClient
+from elevation import ElevationProvider, OpenTopoDataProvider
+from fake_services import make_services_app, straight_route, fake_elevation
+from main import get_route_legs, quote_lane, quote_summary
+from multistop import LegQuoter, quote_stops, quote_matrix
+from route_cache import RouteCache
+
+LA, DENVER = "34.053691,-118.242766", "39.739236,-104.984862"
+CHICAGO, NY = "41.878113,-87.629799", "40.712776,-74.005974"
+
+
+@pytest_asyncio.fixture
+async def services():
+    stats = {}
+    async with TestServer(make_services_app(stats=stats)) as server:
+        base_url = str(server.make_url("")).rstrip("/")
+        async with HttpClient() as client:
+            provider = OpenTopoDataProvider(requests_per_second=1000, url=f"{base_url}/v1/ned10m", client=client)
+            with mock.patch("main.OSRM_URL", base_url), mock.patch("main.NOMINATIM_URL", base_url), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                yield client, provider, stats
+
+
+@pytest.mark.asyncio
+async def test_route_legs_are_split_and_cached(services, tmp_path):
+    client, _, stats = services
+    route_cache = RouteCache(str(tmp_path / "routes.sqlite"))
+    legs = await get_route_legs([LA, DENVER, CHICAGO], client=client, route_cache=route_cache)
+    assert [len(leg) for leg in legs] == [20, 20]
+    assert legs[0][-1] == legs[1][0] == [-104.984862, 39.739236]
+
+    cached = await get_route_legs([LA, DENVER, CHICAGO], client=client, route_cache=route_cache)
+    np.testing.assert_allclose(cached[1], legs[1], atol=1e-6)
+    assert stats["requests"]["route"] == 1
+    route_cache.close()
+
+
+@pytest.mark.asyncio
+async def test_multi_stop_quotes_share_legs(services):
+    client, provider, stats = services
+    quoter = LegQuoter(client, provider=provider)
+
+    trip = await quote_stops(["90012", DENVER, CHICAGO], quoter)
+    longer_trip = await quote_stops([LA, DENVER, CHICAGO, NY], quoter)
+    assert trip["legs"] == 2 and longer_trip["legs"] == 3
+    assert quoter.stats()["legs_computed"] == 3
+    assert quoter.stats()["legs_reused"] == 2
+
+    # Legs add up to the single-lane quotes
+    lanes = [quote_summary(await quote_lane(start, end, client=client, provider=provider))
+             for start, end in ((LA, DENVER), (DENVER, CHICAGO))]
+    assert trip["distance_miles"] == pytest.approx(sum(lane["distance_miles"] for lane in lanes), abs=0.02)
+    assert trip["fuel_consumption"] == pytest.approx(sum(lane["fuel_consumption"] for lane in lanes), abs=0.02)
+
+
+@pytest.mark.asyncio
+async def test_matrix_quotes_every_pair_once(services):
+    client, provider, stats = services
+    quoter = LegQuoter(client, provider=provider)
+
+    result = await quote_matrix([LA, DENVER], [DENVER, CHICAGO, NY], quoter)
+    quotes = result["quotes"]
+    assert len(quotes) == 2 and all(len(row) == 3 for row in quotes)
+    assert quotes[1][0]["distance_miles"] == 0 and quotes[1][0]["legs"] == 0
+    assert quotes[0][2]["distance_miles"] > quotes[0][1]["distance_miles"] > quotes[0][0]["distance_miles"] > 0
+    assert result["road_distance_km"][1][0] == 0
+    assert stats["requests"]["table"] == 1
+    assert stats["requests"]["route"] == quoter.computed == 5
+
+    # A trip through the same points reuses the matrix legs without any OSRM request
+    await quote_stops([LA, DENVER, CHICAGO], quoter)
+    assert stats["requests"]["route"] == 5
+    assert quoter.reused == 2
+
+
+# Elevation source counting the points it is asked for
+class CountingProvider(ElevationProvider):
+    def __init__(self):
+        self.points = 0
+
+    async def get_elevations(self, coordinates):
+        self.points += len(coordinates)
+        await asyncio.sleep(0.01)  # Lets concurrent legs interleave
+        return [fake_elevation(lon, lat) for lon, lat in coordinates]
+
+
+@pytest.mark.asyncio
+async def test_legs_sharing_a_corridor_fetch_it_once():
+    # Denver -> Chicago continues the LA -> Denver leg: the second route repeats all its vertices
+    to_denver = straight_route(-118.242766, 34.053691, -104.984862, 39.739236)
+    to_chicago = to_denver + straight_route(-104.984862, 39.739236, -87.629799, 41.878113)[1:]
+    provider = CountingProvider()
+    quoter = LegQuoter(provider=provider)
+
+    first = await quoter.quote(LA, DENVER, to_denver)
+    second = await quoter.quote(LA, CHICAGO, to_chicago)
+    # Every point of the first leg but its end (densify keeps only the first and last vertex) is reused
+    hits = quoter.stats()["elevation_cache"]["hits"]
+    assert hits == first["points"] - 1
+    assert provider.points == first["points"] + second["points"] - hits
+
+
+@pytest.mark.asyncio
+async def test_overlapping_matrix_legs_fetch_shared_points_once(services, tmp_path):
+    client, _, stats = services
+    # LA -> Chicago runs through Denver: its route repeats every vertex of LA -> Denver
+    to_denver = straight_route(-118.242766, 34.053691, -104.984862, 39.739236)
+    to_chicago = to_denver + straight_route(-104.984862, 39.739236, -87.629799, 41.878113)[1:]
+    route_cache = RouteCache(str(tmp_path / "routes.sqlite"))
+    route_cache.put(LA, DENVER, to_denver)
+    route_cache.put(LA, CHICAGO, to_chicago)
+    provider = CountingProvider()
+    quoter = LegQuoter(client, provider=provider, route_cache=route_cache)
+
+    result = await quote_matrix([LA], [DENVER, CHICAGO], quoter)
+    first, second = result["quotes"][0]
+    assert stats["requests"]["route"] == 0
+    # Both legs are quoted at the same time, the corridor is fetched once (densify keeps only the first
+    # and last vertex of a route, so Denver itself is a point of the first leg only)
+    assert provider.points == second["points"] + 1 < first["points"] + second["points"]
+    assert quoter.cache.stats()["misses"] == provider.points
+    route_cache.close()
+
+
+# Fails the first `failures` requests, then answers like CountingProvider
+class FlakyProvider(CountingProvider):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    async def get_elevations(self, coordinates):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("elevation API unavailable")
+        return await super().get_elevations(coordinates)
+
+
+@pytest.mark.asyncio
+async def test_failed_legs_are_retried_later():
+    route = straight_route(-118.242766, 34.053691, -117.9, 34.2)
+    quoter = LegQuoter(provider=FlakyProvider(failures=1))
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert await quoter.quote(LA, DENVER, route) is None
+        assert (LA, DENVER) not in quoter
+        leg = await quoter.quote(LA, DENVER, route)
+    assert leg["points"] > 0
+    assert quoter.computed == 2
+
+
+# No elevations east of longitude -100
+class WesternProvider(CountingProvider):
+    async def get_elevations(self, coordinates):
+        if any(lon > -100 for lon, lat in coordinates):
+            raise RuntimeError("outside the dataset")
+        return await super().get_elevations(coordinates)
+
+
+@pytest.mark.asyncio
+async def test_failed_matrix_cell_does_not_fail_the_matrix(services):
+    client, _, stats = services
+    quoter = LegQuoter(client, provider=WesternProvider())
+
+    result = await quote_matrix([LA], [DENVER, CHICAGO], quoter)
+    assert result["quotes"][0][0]["distance_miles"] > 0
+    assert result["quotes"][0][1] is None
+    assert (LA, DENVER) in quoter and (LA, CHICAGO) not in quoter
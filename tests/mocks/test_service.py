@@ -0,0 +1,102 @@
+import asyncio
+from unittest import mock
+
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestServer, TestClient
+
+from client import HttpClient
+from elevation import OpenTopoDataProvider
+from fake_services import make_services_app
+from instrumentation import recorder
+from service import QuoteService, LatencyHistogram, make_app
+
+
+@pytest_asyncio.fixture
+async def quote_client():
+    stats = {}
+    async with TestServer(make_services_app(delay=0.01, stats=stats)) as services:
+        base_url = str(services.make_url("")).rstrip("/")
+        async with HttpClient() as http_client:
+            provider = OpenTopoDataProvider(requests_per_second=1000, url=f"{base_url}/v1/ned10m",
+                                            client=http_client)
+            service = QuoteService(http_client, provider)
+            with mock.patch("main.OSRM_URL", base_url), mock.patch("main.NOMINATIM_URL", base_url):
+                async with TestClient(TestServer(make_app(service))) as client:
+                    yield client, service, stats
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(buckets=(0.1, 1))
+    for seconds in (0.05, 0.1, 0.5, 3):
+        histogram.observe(seconds)
+    assert histogram.to_dict() == {"buckets": {"0.1": 2, "1": 1, "+Inf": 1}, "count": 4, "sum": 3.65}
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_are_coalesced(quote_client):
+    client, service, stats = quote_client
+    params = {"origin": "90012", "destination": "80202"}
+
+    responses = await asyncio.gather(*(client.get("/quote", params=params) for _ in range(5)))
+    results = [await response.json() for response in responses]
+
+    assert all(response.status == 200 for response in responses)
+    assert all(result == results[0] for result in results)
+    assert results[0]["distance_miles"] > 0
+    assert stats["requests"]["route"] == 1
+    assert stats["requests"]["search"] == 2
+    assert service.coalesced == 4
+
+    # Once finished, the same quote is computed again
+    await client.get("/quote", params=params)
+    assert stats["requests"]["route"] == 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_expose_stage_histograms(quote_client):
+    client, service, stats = quote_client
+    await client.get("/quote", params={"origin": "41.878113,-87.629799", "destination": "40.712776,-74.005974"})
+    await client.get("/quote", params={"origin": "60602", "destination": "10007", "adaptive": "1"})
+
+    metrics = await (await client.get("/metrics")).json()
+    assert metrics["requests"] == 2
+    assert metrics["in_flight"] == 0
+    latency = metrics["latency_seconds"]
+    assert {"route", "densify", "elevations", "fuel", "price", "total"} <= set(latency)
+    assert latency["total"]["count"] == 2
+    assert latency["densify"]["count"] == 1
+    assert sum(latency["route"]["buckets"].values()) == 2
+
+
+@pytest.mark.asyncio
+async def test_bad_requests(quote_client):
+    client, service, stats = quote_client
+    assert (await client.get("/quote", params={"origin": "90012"})).status == 400
+    assert (await client.get("/quote", params={"origin": "90012", "destination": "80202",
+                                               "fuel_price": "cheap"})).status == 400
+    assert (await client.get("/quote", params={"origin": "abc", "destination": "80202"})).status == 400
+    assert (await client.get("/quote", params={"origin": "90012", "destination": "39.7,-104.9,1"})).status == 400
+    assert (await client.get("/quote", params={"origin": "91.0,-104.9", "destination": "80202"})).status == 400
+    assert stats["requests"].get("route", 0) == 0
+    assert (await client.get("/quote", params={"origin": "00000", "destination": "80202"})).status == 404
+
+
+@pytest.mark.asyncio
+async def test_prometheus_metrics_with_tracing(quote_client):
+    client, service, stats = quote_client
+    recorder.reset()
+    recorder.enabled = True
+    try:
+        await client.get("/quote", params={"origin": "90012", "destination": "80202"})
+        response = await client.get("/metrics", params={"format": "prometheus"})
+        text = await response.text()
+        spans = (await (await client.get("/metrics")).json())["spans"]
+    finally:
+        recorder.enabled = False
+        recorder.reset()
+
+    assert response.status == 200
+    assert 'span="quote/route/geocode"' in text
+    assert 'span="quote/elevations/fetch_elevations/elevation_batch"' in text
+    assert spans["quote"]["count"] == 1
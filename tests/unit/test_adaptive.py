@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from adaptive import adaptive_profile, FUEL_TOLERANCE
+from fuel import calculate_fuel_profile
+from geometry import densify, segment_distances
+
+# LA -> Denver as a few straight OSRM-like legs
+ROUTE = np.array([[-118.24, 34.05], [-116.0, 35.2], [-112.5, 37.0], [-108.6, 39.1], [-104.98, 39.74]])
+
+
+# Synthetic terrain: gentle plains with one mountain range around lon -108..-106
+def terrain(points):
+    lon, lat = points[:, 0], points[:, 1]
+    plains = 500 + 40 * (lon + 118)
+    mountains = 1500 * np.exp(-((lon + 107) / 0.8) ** 2) * (1 + 0.3 * np.sin(lat * 40))
+    return plains + mountains
+
+
+async def get_elevations(points):
+    get_elevations.requested += len(points)
+    return terrain(np.asarray(points)).tolist()
+
+
+@pytest.mark.asyncio
+async def test_adaptive_fuel_within_tolerance_with_fewer_points():
+    fine = densify(ROUTE)
+    fine_fuel, _ = calculate_fuel_profile(terrain(fine), segment_distances(fine), 5.75)
+
+    get_elevations.requested = 0
+    profile = await adaptive_profile(ROUTE, get_elevations)
+    adaptive_fuel, _ = calculate_fuel_profile(profile["elevations"], profile["segment_distances"], 5.75)
+
+    assert profile["fine_points"] == len(fine)
+    assert get_elevations.requested == len(profile["points"]) < len(fine) / 3
+    assert profile["segment_distances"].sum() == pytest.approx(segment_distances(fine).sum())
+    assert adaptive_fuel == pytest.approx(fine_fuel, rel=FUEL_TOLERANCE)
+
+
+@pytest.mark.asyncio
+async def test_missing_coarse_samples_are_refined():
+    async def with_gap(points):
+        heights = terrain(np.asarray(points))
+        heights[len(heights) // 2] = np.nan
+        return heights.tolist()
+
+    profile = await adaptive_profile(ROUTE[:2], with_gap)
+    assert profile["refined_points"] > 0
+    assert profile["points"][0].tolist() == ROUTE[0].tolist()
+    assert profile["points"][-1].tolist() == ROUTE[1].tolist()
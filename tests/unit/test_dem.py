@@ -0,0 +1,64 @@
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dem import DemTile, LocalDemProvider, save_tile
+from main import fetch_elevations
+
+TILES_DIR = Path(__file__).parent.parent / "fixtures" / "dem"
+
+
+# The synthetic tile is a plane, so bilinear interpolation must reproduce it exactly
+def plane(lon, lat):
+    row = (40.0 - lat) / 0.05
+    col = (lon + 105.0) / 0.05
+    return 1500 + 20 * row + 10 * col
+
+
+def test_tile_is_memory_mapped():
+    tile = DemTile.load(TILES_DIR / "denver.npy")
+    assert isinstance(tile.heights, np.memmap)
+    assert (tile.west, tile.east, tile.south, tile.north) == pytest.approx((-105.0, -104.0, 39.0, 40.0))
+
+
+def test_bilinear_sampling_matches_plane():
+    provider = LocalDemProvider.from_directory(TILES_DIR)
+    rng = np.random.default_rng(0)
+    lon = rng.uniform(-105.0, -104.2, 1000)
+    lat = rng.uniform(39.2, 40.0, 1000)
+
+    elevations = provider.sample(np.column_stack((lon, lat)))
+    np.testing.assert_allclose(elevations, plane(lon, lat), rtol=1e-9)
+
+
+def test_missing_data_and_points_outside_tiles():
+    provider = LocalDemProvider.from_directory(TILES_DIR)
+    # The south-east corner node is nodata, the last point is outside the tile
+    elevations = provider.sample([(-104.0, 39.0), (-104.99, 39.99), (-90.0, 35.0)])
+    assert np.isnan(elevations[0])
+    assert elevations[1] == pytest.approx(plane(-104.99, 39.99))
+    assert np.isnan(elevations[2])
+
+
+def test_multiple_tiles(tmp_path):
+    save_tile(tmp_path / "west", np.full((3, 3), 100.0), west=-2.0, north=1.0, cell_size=0.5)
+    save_tile(tmp_path / "east", np.full((3, 3), 200.0), west=0.0, north=1.0, cell_size=0.5)
+    provider = LocalDemProvider.from_directory(tmp_path)
+    assert provider.sample([(-1.5, 0.5), (0.5, 0.5)]).tolist() == [100.0, 200.0]
+
+
+@pytest.mark.asyncio
+async def test_fetch_elevations_with_local_provider():
+    provider = LocalDemProvider.from_directory(TILES_DIR)
+    route = np.column_stack((np.linspace(-105.0, -104.1, 50000), np.linspace(39.1, 40.0, 50000))).tolist()
+
+    start_time = time.perf_counter()
+    elevations = await fetch_elevations(route, provider=provider)
+    elapsed = time.perf_counter() - start_time
+
+    assert len(elevations) == len(route)
+    assert elevations[0] == pytest.approx(plane(-105.0, 39.1))
+    assert elevations[-1] == pytest.approx(plane(-104.1, 40.0))
+    assert elapsed < 1.0
@@ -0,0 +1,96 @@
+from unittest import mock
+
+import pytest
+
+from elevation_cache import ElevationCache, quantize_keys, NED10M_RESOLUTION
+from main import fetch_elevations
+
+
+def test_quantize_keys_snaps_to_grid():
+    # A point in the middle of a grid cell
+    lon = round(-104.984862 / NED10M_RESOLUTION) * NED10M_RESOLUTION
+    lat = round(39.739236 / NED10M_RESOLUTION) * NED10M_RESOLUTION
+    keys = quantize_keys([(lon, lat), (lon + NED10M_RESOLUTION / 4, lat), (lon, lat + NED10M_RESOLUTION)])
+    assert keys[0] == keys[1]
+    assert keys[0] != keys[2]
+    assert quantize_keys([(lon, lat)])[0] != quantize_keys([(-lon, -lat)])[0]
+
+
+def test_hits_misses_and_persistence(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    points = [(-104.98, 39.73), (-104.97, 39.74), (-104.96, 39.75)]
+
+    cache = ElevationCache(path)
+    cache.put_many(points[:2], [1600.0, None])
+    elevations, missing = cache.get_many(points)
+    assert elevations == [1600.0, None, None]
+    assert missing == [1, 2]
+    cache.close()
+
+    cache = ElevationCache(path)
+    assert cache.get_many(points[:1]) == ([1600.0], [])
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 0
+    cache.close()
+
+
+def test_lru_eviction(tmp_path):
+    cache = ElevationCache(tmp_path / "cache.sqlite", max_entries=2)
+    first, second, third = (-100.0, 40.0), (-100.1, 40.0), (-100.2, 40.0)
+    cache.put_many([first], [1.0])
+    cache.put_many([second], [2.0])
+    cache.get_many([first])  # `second` becomes the least recently used point
+    cache.put_many([third], [3.0])
+
+    assert len(cache) == 2
+    assert cache.get_many([first, second, third])[0] == [1.0, None, 3.0]
+
+
+@pytest.mark.asyncio
+async def test_fetch_elevations_requests_only_misses(tmp_path):
+    cache = ElevationCache(tmp_path / "cache.sqlite")
+    route = [(-100.0, 40.0 + i / 100) for i in range(5)]
+    cache.put_many(route[:3], [10.0, 11.0, 12.0])
+
+    requested = []
+
+    async def fake_batch(session, coordinates, url):
+        requested.extend(coordinates)
+        return [20.0 + i for i in range(len(coordinates))]
+
+    with mock.patch("elevation.get_elevations_batch", side_effect=fake_batch):
+        elevations = await fetch_elevations(route, cache=cache)
+        assert elevations == [10.0, 11.0, 12.0, 20.0, 21.0]
+        assert requested == route[3:]
+
+        # The second quote of the same lane does not hit the API at all
+        requested.clear()
+        assert await fetch_elevations(route, cache=cache) == elevations
+        assert requested == []
+    assert len(cache) == 5
+
+
+@pytest.mark.asyncio
+async def test_fetched_batches_are_stored_once(tmp_path):
+    cache = ElevationCache(tmp_path / "cache.sqlite")
+    route = [(-100.0, 40.0 + i / 100) for i in range(250)]
+
+    async def fake_batch(session, coordinates, url):
+        return [float(i) for i in range(len(coordinates))]
+
+    with mock.patch("elevation.get_elevations_batch", side_effect=fake_batch), \
+            mock.patch.object(cache, "put_many", wraps=cache.put_many) as put_many:
+        await fetch_elevations(route, cache=cache)
+    # One checkpoint per batch of 100, no second write of the whole route
+    assert sorted(len(call.args[0]) for call in put_many.call_args_list) == [50, 100, 100]
+
+
+def test_entry_count_is_kept_without_counting(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = ElevationCache(path)
+    cache.put_many([(-100.0, 40.0), (-100.1, 40.0)], [1.0, 2.0])
+    cache.put_many([(-100.1, 40.0), (-100.2, 40.0)], [2.5, None])  # One known point, one without elevation
+    assert len(cache) == 2
+    assert cache.get_many([(-100.1, 40.0)])[0] == [2.5]
+    cache.close()
+    assert len(ElevationCache(path)) == 2
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from fuel import calculate_fuel_profile, consumption_factors, segment_slopes, MILES_PER_KILOMETER
+
+
+# Segment-by-segment reference of the same model
+def reference_fuel(elevations, distances_km, base_fuel_consumption):
+    fuel = []
+    for i, distance in enumerate(distances_km):
+        slope = 0
+        if elevations[i] is not None and elevations[i + 1] is not None and distance > 0:
+            slope = max(min((elevations[i + 1] - elevations[i]) / (distance * 1000), 0.20), -0.20)
+        if 0 < slope <= 0.05:
+            factor = 1 + slope * 0.10
+        elif slope > 0.05:
+            factor = 1 + slope * 0.15
+        elif -0.05 <= slope < 0:
+            factor = 1 + slope * 0.02
+        else:
+            factor = 1 + slope * 0.05
+        fuel.append(base_fuel_consumption * factor * distance * MILES_PER_KILOMETER / 100)
+    return fuel
+
+
+def test_consumption_factors_piecewise():
+    slopes = np.array([0.03, 0.10, 0.5, -0.03, -0.10, -0.5, 0.0])
+    expected = [1.003, 1.015, 1.03, 0.9994, 0.995, 0.99, 1.0]
+    np.testing.assert_allclose(consumption_factors(slopes), expected)
+
+
+def test_profile_matches_reference_with_uneven_segments():
+    rng = np.random.default_rng(0)
+    distances = rng.uniform(0.01, 0.2, 500)
+    elevations = (1500 + np.cumsum(rng.normal(0, 5, 501))).tolist()
+    elevations[10] = None
+    elevations[200] = None
+
+    total, per_segment = calculate_fuel_profile(elevations, distances, 5.75)
+    expected = reference_fuel(elevations, distances, 5.75)
+
+    np.testing.assert_allclose(per_segment, expected, rtol=1e-12)
+    assert total == pytest.approx(sum(expected), rel=1e-12)
+
+
+def test_missing_and_zero_length_segments_are_flat():
+    slopes = segment_slopes([100.0, None, 120.0, 130.0, 130.0], [0.1, 0.1, 0.1, 0.0])
+    assert slopes.tolist() == [0.0, 0.0, 0.1, 0.0]
+
+
+def test_flat_route_uses_base_consumption():
+    total, per_segment = calculate_fuel_profile([200.0] * 11, [10.0] * 10, 5.75)
+    assert total == pytest.approx(5.75 * 100 * MILES_PER_KILOMETER / 100)
+    assert len(per_segment) == 10
+
+
+def test_length_mismatch():
+    with pytest.raises(ValueError):
+        calculate_fuel_profile([1.0, 2.0], [0.1, 0.1], 5.75)
@@ -0,0 +1,50 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from elevation import ElevationProvider, fill_elevation_gaps
+from main import quote_route
+
+ROUTE = [[-118.24, 34.05], [-117.9, 34.2], [-117.5, 34.21], [-117.0, 34.6], [-116.2, 35.0]]
+
+
+def test_gaps_are_interpolated_along_the_distance():
+    distances = [0, 1, 2, 4, 8, 9]
+    filled, count = fill_elevation_gaps([None, 100, None, 300, np.nan, None], distances)
+    np.testing.assert_allclose(filled, [100, 100, 100 + 200 / 3, 300, 300, 300])
+    assert count == 4
+
+    filled, count = fill_elevation_gaps([None, None], [0, 1])
+    assert np.isnan(filled).all() and count == 0
+
+
+# Steady climb with one batch of heights (points 100-199) missing
+class GappyProvider(ElevationProvider):
+    async def get_elevations(self, coordinates):
+        heights = [400 + 0.002 * i ** 1.5 for i in range(len(coordinates))]
+        return [None if 100 <= i < 200 else height for i, height in enumerate(heights)]
+
+
+class CompleteProvider(ElevationProvider):
+    async def get_elevations(self, coordinates):
+        return [400 + 0.002 * i ** 1.5 for i in range(len(coordinates))]
+
+
+@pytest.mark.asyncio
+async def test_quote_fills_gaps_and_reports_completeness():
+    with contextlib.redirect_stdout(io.StringIO()):
+        complete = await quote_route(ROUTE, provider=CompleteProvider())
+        filled = await quote_route(ROUTE, provider=GappyProvider())
+        unfilled = await quote_route(ROUTE, provider=GappyProvider(), fill_gaps=False)
+
+    points = len(complete["detailed_route"])
+    assert complete["height_accuracy"] == 100 and complete["missing_heights"] == 0
+    assert filled["missing_heights"] == 100
+    assert filled["height_accuracy"] == pytest.approx((points - 100) / points * 100)
+    assert None not in filled["elevations"]
+
+    # The climb hidden in the gap is still paid for once the gap is interpolated
+    assert unfilled["fuel_consumption"] < filled["fuel_consumption"]
+    assert filled["fuel_consumption"] == pytest.approx(complete["fuel_consumption"], rel=1e-4)
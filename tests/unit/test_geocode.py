@@ -0,0 +1,58 @@
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from geocode import build_zip_index, ZipIndex, ZipGeocoder, zip_to_int
+from main import get_coordinates_by_zip
+
+GAZETTEER = Path(__file__).parent.parent / "fixtures" / "zcta_gazetteer_sample.txt"
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = tmp_path / "zip_index.npy"
+    assert build_zip_index(GAZETTEER, path) == 5
+    return path
+
+
+def test_zip_to_int():
+    assert zip_to_int("02134") == 2134
+    assert zip_to_int("80202-1234") == 80202
+    assert zip_to_int("8020") is None
+    assert zip_to_int("ABCDE") is None
+
+
+def test_index_lookup(index_path):
+    index = ZipIndex.load(index_path)
+    assert isinstance(index.records, np.memmap)
+    assert len(index) == 5
+    assert index.lookup("02134") == "42.358052,-71.131082"
+    assert index.lookup("90012") == "34.061396,-118.238479"
+    assert index.lookup("90013") is None
+    assert index.lookup("00000") is None
+
+
+def test_build_from_plain_csv(tmp_path):
+    csv_path = tmp_path / "zips.csv"
+    csv_path.write_text("zip,lat,lon\n80202,39.75,-104.99\n")
+    build_zip_index(csv_path, tmp_path / "index.npy")
+    assert ZipIndex.load(tmp_path / "index.npy").lookup("80202") == "39.75,-104.99"
+
+
+@pytest.mark.asyncio
+async def test_index_first_then_memoized_nominatim(index_path):
+    geocoder = ZipGeocoder(index_path)
+    response = mock.MagicMock()
+    response.json = mock.AsyncMock(return_value=[{"lat": "45.5", "lon": "-122.6", "display_name": "Portland"}])
+
+    with mock.patch("main.zip_geocoder", geocoder), mock.patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value.__aenter__.return_value = response
+
+        assert await get_coordinates_by_zip("80202") == "39.749437,-104.994985"
+        assert mock_get.call_count == 0
+
+        assert await get_coordinates_by_zip("97201") == "45.5,-122.6"
+        assert await get_coordinates_by_zip("97201") == "45.5,-122.6"
+        assert mock_get.call_count == 1
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from main import haversine, interpolate_points_distance_based, get_route_distance
+from geometry import (route_to_array, haversine_np, segment_distances, cumulative_distance, route_distance, densify,
+                      project_meters, simplify)
+
+
+# Synthetic OSRM-like route ([lon, lat] pairs) from LA towards Denver with uneven segment lengths
+def make_route(num_points=200, seed=0):
+    rng = np.random.default_rng(seed)
+    steps = rng.uniform(0.0005, 0.02, size=(num_points - 1, 2))
+    start = np.array([-118.242766, 34.053691])
+    return np.vstack((start, start + np.cumsum(steps, axis=0))).tolist()
+
+
+def test_haversine_matches_scalar_version():
+    expected = haversine(34.053691, -118.242766, 39.739236, -104.984862)
+    assert haversine_np(34.053691, -118.242766, 39.739236, -104.984862) == pytest.approx(expected, rel=1e-12)
+
+
+def test_route_to_array_rejects_bad_shape():
+    with pytest.raises(ValueError):
+        route_to_array([1.0, 2.0, 3.0])
+
+
+def test_densify_matches_loop_version():
+    route = make_route()
+    expected = interpolate_points_distance_based(route)
+    result = densify(route_to_array(route))
+
+    assert result.shape == (len(expected), 2)
+    np.testing.assert_allclose(result, np.asarray(expected), rtol=0, atol=1e-12)
+
+
+def test_densify_custom_spacing():
+    route = make_route(num_points=50, seed=1)
+    expected = interpolate_points_distance_based(route, max_distance_per_point=0.5)
+    np.testing.assert_allclose(densify(route, 0.5), np.asarray(expected), rtol=0, atol=1e-12)
+
+
+def test_densify_single_point_route():
+    route = [[-118.242766, 34.053691]]
+    assert densify(route).tolist() == [route[0], route[0]]
+
+
+def test_distances_match_loop_version():
+    route = make_route()
+    detailed = densify(route)
+
+    assert route_distance(detailed) == pytest.approx(get_route_distance(detailed.tolist()), rel=1e-12)
+
+    cumulative = cumulative_distance(detailed)
+    assert cumulative[0] == 0
+    assert cumulative[-1] == pytest.approx(route_distance(detailed), rel=1e-12)
+    assert len(segment_distances(detailed)) == len(detailed) - 1
+
+
+def test_simplify_keeps_shape_within_tolerance():
+    detailed = densify(route_to_array(make_route()))
+    simplified = simplify(detailed, tolerance_m=20)
+    assert 2 < len(simplified) < len(detailed) / 5
+    np.testing.assert_array_equal(simplified[[0, -1]], detailed[[0, -1]])
+
+    # Every dropped point is within the tolerance of the simplified polyline
+    projected = project_meters(np.vstack((detailed, simplified)))
+    points, line = projected[:len(detailed)], projected[len(detailed):]
+    start, end = line[:-1], line[1:]
+    direction = end - start
+    t = np.clip(np.einsum("psk,sk->ps", points[:, None] - start, direction) / (direction ** 2).sum(axis=1), 0, 1)
+    nearest = np.linalg.norm(points[:, None] - start - t[..., None] * direction, axis=2).min(axis=1)
+    assert nearest.max() <= 20 + 1e-6
+
+
+def test_simplify_straight_line_to_its_ends():
+    line = np.column_stack((np.linspace(-100, -99, 50), np.linspace(40, 40.5, 50)))
+    np.testing.assert_array_equal(simplify(line), line[[0, -1]])
+    np.testing.assert_array_equal(simplify(line[:2]), line[:2])
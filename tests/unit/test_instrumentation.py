@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from instrumentation import SpanRecorder, span, instrumented, recorder
+
+
+@pytest.fixture
+def enabled_recorder():
+    recorder.reset()
+    recorder.enabled = True
+    yield recorder
+    recorder.enabled = False
+    recorder.reset()
+
+
+@instrumented("batch")
+async def fetch_batch(delay):
+    await asyncio.sleep(delay)
+    return delay
+
+
+@instrumented("parse")
+def parse():
+    return "parsed"
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_tasks(enabled_recorder):
+    with span("quote"):
+        with span("elevations"):
+            results = await asyncio.gather(*(asyncio.ensure_future(fetch_batch(0.01)) for _ in range(3)))
+        assert parse() == "parsed"
+
+    summary = enabled_recorder.summary()
+    assert results == [0.01] * 3
+    assert set(summary) == {"quote", "quote/elevations", "quote/elevations/batch", "quote/parse"}
+    assert summary["quote/elevations/batch"]["count"] == 3
+    assert summary["quote/elevations/batch"]["p50_ms"] >= 10
+    assert summary["quote"]["total_ms"] >= summary["quote/elevations"]["total_ms"]
+
+
+def test_percentiles_and_exports():
+    spans = SpanRecorder(enabled=True)
+    for ms in range(1, 101):
+        spans.record("fuel", ms * 1_000_000)
+
+    stats = spans.summary()["fuel"]
+    assert stats["count"] == 100
+    assert stats["p50_ms"] == pytest.approx(50.5)
+    assert stats["p99_ms"] == pytest.approx(99.01)
+    assert '"fuel"' in spans.to_json()
+
+    text = spans.to_prometheus()
+    assert '# TYPE geofuel_span_duration_seconds summary' in text
+    assert 'geofuel_span_duration_seconds{span="fuel",quantile="0.95"} 0.095050000' in text
+    assert 'geofuel_span_duration_seconds_count{span="fuel"} 100' in text
+
+
+def test_max_samples_keeps_totals():
+    spans = SpanRecorder(enabled=True, max_samples=10)
+    for _ in range(50):
+        spans.record("densify", 1000)
+    assert len(spans.samples["densify"]) == 10
+    assert spans.summary()["densify"]["count"] == 50
+
+
+def test_disabled_recorder_records_only_timings():
+    recorder.reset()
+    timings = {}
+    with span("fuel", timings):
+        time.sleep(0.001)
+    with span("fuel"):
+        pass
+    assert recorder.summary() == {}
+    assert timings["fuel"] >= 0.001
@@ -0,0 +1,117 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from elevation import ElevationProvider
+from elevation_cache import ElevationCache
+from fuel import calculate_fuel_profile, MILES_PER_KILOMETER
+from geometry import densify, segment_distances
+from main import quote_route, stream_quote
+from pipeline import densified_chunks, elevation_batches, stream_estimates
+
+ROUTE = [[-118.24, 34.05], [-117.9, 34.2], [-117.5, 34.21], [-117.0, 34.6], [-116.2, 35.0]]
+
+
+def terrain(points):
+    points = np.asarray(points)
+    return 500 + 300 * np.sin(points[:, 0] * 20) + 100 * np.cos(points[:, 1] * 30)
+
+
+# Provider answering out of order (later batches first) with one missing height per batch
+class ShuffledProvider(ElevationProvider):
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_elevations(self, coordinates):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01 / self.calls)
+        self.in_flight -= 1
+        heights = terrain(coordinates).tolist()
+        heights[0] = None
+        return heights
+
+
+# Heights missing at the start, over a stretch longer than several batches and at the end of ROUTE
+class GappyProvider(ElevationProvider):
+    def __init__(self):
+        self.calls = 0
+
+    async def get_elevations(self, coordinates):
+        self.calls += 1
+        lon = np.asarray(coordinates)[:, 0]
+        gaps = (lon < -118.23) | ((lon > -117.8) & (lon < -117.4)) | (lon > -116.21)
+        return [None if gap else height for gap, height in zip(gaps, terrain(coordinates).tolist())]
+
+
+@pytest.mark.asyncio
+async def test_chunks_match_densify():
+    chunks = [chunk async for chunk in densified_chunks(ROUTE, segments_per_chunk=2)]
+    assert len(chunks) > 3
+    np.testing.assert_array_equal(np.concatenate(chunks), densify(ROUTE))
+
+
+@pytest.mark.asyncio
+async def test_batches_stay_in_route_order():
+    provider = ShuffledProvider()
+    batches = [batch async for batch in elevation_batches(densified_chunks(ROUTE), provider.get_elevations,
+                                                            batch_size=100, max_in_flight=3)]
+    points = np.concatenate([points for points, _ in batches])
+    np.testing.assert_array_equal(points, densify(ROUTE))
+    assert all(len(elevations) == len(points) for points, elevations in batches)
+    assert provider.max_in_flight <= 3
+
+
+@pytest.mark.asyncio
+async def test_running_estimate_matches_full_computation():
+    provider = ShuffledProvider()
+    estimates = [estimate async for estimate in stream_estimates(ROUTE, provider.get_elevations, 5.75,
+                                                                 batch_size=100)]
+
+    # One missing height per batch, interpolated between its neighbours
+    detailed = densify(ROUTE)
+    distances = segment_distances(detailed)
+    heights = terrain(detailed)
+    gaps = np.arange(len(detailed)) % 100 == 0
+    cumulative_km = np.concatenate(([0.0], np.cumsum(distances)))
+    heights[gaps] = np.interp(cumulative_km[gaps], cumulative_km[~gaps], heights[~gaps])
+    fuel, _ = calculate_fuel_profile(heights, distances, 5.75)
+
+    final = estimates[-1]
+    assert len(estimates) == provider.calls + 1
+    assert [estimate["complete"] for estimate in estimates] == [False] * provider.calls + [True]
+    assert [estimate["points"] for estimate in estimates] == sorted(estimate["points"] for estimate in estimates)
+    assert [estimate["fuel_consumption"] for estimate in estimates] == sorted(estimate["fuel_consumption"]
+                                                                              for estimate in estimates)
+    assert final["points"] == len(detailed)
+    assert final["missing_heights"] == provider.calls
+    assert final["distance_miles"] == pytest.approx(distances.sum() * MILES_PER_KILOMETER)
+    assert final["fuel_consumption"] == pytest.approx(fuel)
+    assert final["height_accuracy"] == pytest.approx((len(detailed) - provider.calls) / len(detailed) * 100)
+
+
+@pytest.mark.asyncio
+async def test_stream_quote_matches_quote_route():
+    expected = await quote_route(ROUTE, provider=GappyProvider())
+    assert expected["missing_heights"] > 300  # Gaps longer than an elevation batch
+
+    cache = ElevationCache(":memory:")
+    provider = GappyProvider()
+    estimates = []
+    quote = await stream_quote(ROUTE, cache=cache, provider=provider, on_estimate=estimates.append)
+
+    assert len(estimates) == provider.calls + 1
+    for field in ("points", "missing_heights", "height_accuracy", "distance_miles", "fuel_consumption", "fuel_cost",
+                  "price", "total_cost"):
+        assert quote[field] == pytest.approx(expected[field]), field
+
+    # Elevations go through the cache: streaming the lane again requests only the points without a height
+    provider.calls = 0
+    again = await stream_quote(ROUTE, cache=cache, provider=provider)
+    assert again["fuel_consumption"] == pytest.approx(quote["fuel_consumption"])
+    assert cache.stats()["hits"] == quote["points"] - quote["missing_heights"]
+    assert provider.calls < len(estimates) - 1
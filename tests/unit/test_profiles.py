@@ -0,0 +1,87 @@
+import contextlib
+import io
+import sqlite3
+
+import numpy as np
+import pytest
+
+from elevation import ElevationProvider
+from main import quote_route, quote_summary
+from profiles import ProfileStore
+
+ROUTES = {
+    ("LA", "Barstow"): [[-118.24, 34.05], [-117.9, 34.2], [-117.5, 34.21], [-117.0, 34.6], [-116.2, 35.0]],
+    ("LA", "Denver"): [[-118.24, 34.05], [-112.0, 36.5], [-104.98, 39.74]],
+    ("Denver", "Chicago"): [[-104.98, 39.74], [-95.0, 41.0], [-87.63, 41.88]],
+}
+
+
+class TerrainProvider(ElevationProvider):
+    async def get_elevations(self, coordinates):
+        heights = [900 + 600 * np.sin(lon * 3) + 150 * np.cos(lat * 40) for lon, lat in coordinates]
+        heights[5] = None
+        return heights
+
+
+async def quote(route, **pricing):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return await quote_route(route, provider=TerrainProvider(), **pricing)
+
+
+@pytest.mark.asyncio
+async def test_repricing_matches_a_full_quote(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.sqlite"))
+    for (origin, destination), route in ROUTES.items():
+        store.put_quote(origin, destination, await quote(route))
+    assert len(store) == 3
+    distances, factors = store.get("LA", "Denver")
+    assert distances.dtype == factors.dtype == np.float32 and len(distances) == len(factors)
+
+    book = store.load_book()
+    for pricing in ({}, {"base_fuel_consumption": 7.1, "fuel_cost_per_gallon": 4.25}):
+        repriced = {(q["origin"], q["destination"]): q for q in book.quotes(**pricing)}
+        for lane, route in ROUTES.items():
+            expected = quote_summary(await quote(route, **pricing))
+            result = repriced[lane]
+            assert result.keys() == {"origin", "destination", *expected}
+            for field in ("distance_miles", "fuel_consumption", "fuel_cost", "price"):
+                assert result[field] == pytest.approx(expected[field], abs=0.011)
+            assert result["total_cost"] == pytest.approx(expected["total_cost"], abs=1)
+            assert result["points"] == expected["points"]
+            assert result["height_accuracy"] == expected["height_accuracy"] < 100
+    store.close()
+
+
+def test_margin_tiers_and_per_lane_consumption(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.sqlite"))
+    for name, miles in (("short", 400), ("gap", 500.5), ("medium", 1000), ("long", 2000)):
+        km = miles / 0.621371
+        store.put(name, "x", [km / 2, km / 2], [1.0, 1.0])
+    book = store.load_book()
+    assert book.lanes == [("gap", "x"), ("long", "x"), ("medium", "x"), ("short", "x")]
+
+    prices = book.reprice(base_fuel_consumption=10, fuel_cost_per_gallon=1, margins=(0.3, 0.2, 0.1))
+    np.testing.assert_allclose(prices["fuel_consumption"], [50.05, 200, 100, 40], rtol=1e-6)
+    np.testing.assert_allclose(prices["price"] / prices["fuel_cost"], [1.1, 1.1, 1.2, 1.3])
+
+    per_lane = book.reprice(base_fuel_consumption=np.array([10, 5, 10, 5]), fuel_cost_per_gallon=1)
+    np.testing.assert_allclose(per_lane["fuel_consumption"], [50.05, 100, 100, 20], rtol=1e-6)
+    store.close()
+
+
+def test_stores_without_missing_heights_are_upgraded(tmp_path):
+    path = str(tmp_path / "profiles.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE profiles (origin TEXT NOT NULL, destination TEXT NOT NULL, "
+                       "distances BLOB NOT NULL, factors BLOB NOT NULL, created_at REAL NOT NULL, "
+                       "PRIMARY KEY (origin, destination))")
+    connection.execute("INSERT INTO profiles VALUES ('a', 'b', ?, ?, 0)",
+                       (np.ones(3, dtype="<f4").tobytes(), np.ones(3, dtype="<f4").tobytes()))
+    connection.commit()
+    connection.close()
+
+    store = ProfileStore(path)
+    store.put("c", "d", [1.0], [1.0], missing_heights=1)
+    quotes = store.load_book().quotes()
+    assert [(q["points"], q["height_accuracy"]) for q in quotes] == [(4, 100.0), (2, 50.0)]
+    store.close()
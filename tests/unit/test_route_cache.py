@@ -0,0 +1,48 @@
+from unittest import mock
+
+import pytest
+
+from main import get_route
+from route_cache import RouteCache, route_key, pack_geometry, unpack_geometry
+
+ROUTE = [[-118.242766, 34.053691], [-117.123456, 34.5], [-104.984862, 39.739236]]
+
+
+def test_route_key_rounds_coordinates():
+    assert route_key("34.05369149,-118.2427661", "39.739236,-104.984862") == "34.0537,-118.2428;39.7392,-104.9849"
+    assert route_key("34.05369149,-118.2427661", "1,2") == route_key("34.053688,-118.242770", "1.0,2.0")
+
+
+def test_packed_geometry_is_exact_for_osrm_coordinates():
+    blob = pack_geometry(ROUTE)
+    assert len(blob) == 8 * len(ROUTE)
+    assert unpack_geometry(blob).tolist() == ROUTE
+
+
+def test_ttl_and_stats(tmp_path):
+    cache = RouteCache(tmp_path / "routes.sqlite", ttl=60)
+    assert cache.get("34.05,-118.24", "39.73,-104.98") is None
+    cache.put("34.05,-118.24", "39.73,-104.98", ROUTE)
+    assert cache.get("34.05,-118.24", "39.73,-104.98") == ROUTE
+
+    with mock.patch("time.time", return_value=10 ** 10):
+        assert cache.get("34.05,-118.24", "39.73,-104.98") is None
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["hit_rate"] == pytest.approx(100 / 3)
+
+
+@pytest.mark.asyncio
+async def test_get_route_uses_cache():
+    cache = RouteCache(":memory:")
+    response = mock.MagicMock()
+    response.json = mock.AsyncMock(return_value={"routes": [{"geometry": {"coordinates": ROUTE}}]})
+
+    with mock.patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value.__aenter__.return_value = response
+        assert await get_route("34.053691,-118.242766", "39.739236,-104.984862", route_cache=cache) == ROUTE
+        assert await get_route("34.053691,-118.242766", "39.739236,-104.984862", route_cache=cache) == ROUTE
+        assert mock_get.call_count == 1
+
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,61 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from elevation import ElevationProvider
+from fuel import calculate_fuel_profile
+from geometry import densify, segment_distances
+from main import quote_route
+from route_file import RouteFile, save_route, save_quote
+
+ROUTE = [[-118.24, 34.05], [-117.9, 34.2], [-117.5, 34.21], [-117.0, 34.6], [-116.2, 35.0]]
+
+
+class TerrainProvider(ElevationProvider):
+    async def get_elevations(self, coordinates):
+        heights = [500 + 3500 * abs(np.sin(lon * 2)) + 10 * np.cos(lat * 30) for lon, lat in coordinates]
+        heights[7] = None
+        return heights
+
+
+def test_round_trip_is_compact_and_memory_mapped(tmp_path):
+    coords = densify(ROUTE)
+    elevations = np.linspace(-80, 4300, len(coords))
+    elevations[3] = np.nan
+    path = tmp_path / "lane.route"
+    save_route(path, coords, elevations, meta={"origin": "LA", "destination": "Barstow"})
+
+    route = RouteFile(path)
+    assert len(route) == len(coords)
+    assert route.meta == {"origin": "LA", "destination": "Barstow"}
+    assert path.stat().st_size < 14 * len(coords) + 1024
+    for column in route.columns.values():
+        assert np.shares_memory(column, route.data)
+        assert not column.flags.writeable
+
+    np.testing.assert_allclose(route.coords(), coords, atol=5e-7)
+    np.testing.assert_allclose(route.elevations(), elevations, atol=0.1)
+    assert np.isnan(route.elevations()[3])
+    np.testing.assert_allclose(route.segment_distances(), segment_distances(coords), atol=1e-5)
+    assert route.cumulative_km()[-1] == pytest.approx(segment_distances(coords).sum(), abs=1e-5)
+
+
+def test_rejects_other_files_and_out_of_range_elevations(tmp_path):
+    (tmp_path / "other.route").write_bytes(b"not a route file")
+    with pytest.raises(ValueError):
+        RouteFile(tmp_path / "other.route")
+    with pytest.raises(ValueError):
+        save_route(tmp_path / "high.route", ROUTE, [0, 0, 0, 0, 7000])
+
+
+@pytest.mark.asyncio
+async def test_saved_quote_gives_the_same_fuel(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        quote = await quote_route(ROUTE, provider=TerrainProvider())
+    save_quote(tmp_path / "lane.route", quote)
+
+    route = RouteFile(tmp_path / "lane.route")
+    fuel, _ = calculate_fuel_profile(route.elevations(), route.segment_distances(), 5.75)
+    assert fuel == pytest.approx(quote["fuel_consumption"], rel=1e-4)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from batch import reuse_rate
+from elevation import ElevationProvider
+from elevation_cache import ElevationCache
+from geometry import densify
+from main import fetch_elevations
+from spatial_index import SpatialElevationIndex, METERS_PER_DEGREE
+
+
+def test_lookup_finds_samples_within_the_radius():
+    index = SpatialElevationIndex(radius_m=30)
+    lat = 45.0
+    meters_per_lon = METERS_PER_DEGREE * np.cos(np.radians(lat))
+    index.add([(-100.0, lat), (-100.0 + 0.001, lat)], [1000.0, None])
+    assert len(index) == 1
+
+    east = [(-100.0 + offset / meters_per_lon, lat) for offset in (10, 29, 31, 60)]
+    north = [(-100.0, lat + offset / METERS_PER_DEGREE) for offset in (-29, -31)]
+    assert index.lookup(east + north) == [1000.0, 1000.0, None, None, 1000.0, None]
+    assert index.stats()["hits"] == 3 and index.stats()["misses"] == 3
+
+
+def test_nearest_sample_wins():
+    index = SpatialElevationIndex(radius_m=100)
+    index.add([(-100.0, 40.0), (-100.0 + 150 / METERS_PER_DEGREE, 40.0)], [1000.0, 2000.0])
+    assert index.lookup([(-100.0, 40.0 + 20 / METERS_PER_DEGREE)]) == [1000.0]
+    assert index.lookup([(-100.0 + 140 / METERS_PER_DEGREE, 40.0)]) == [2000.0]
+
+
+def test_index_from_cache():
+    cache = ElevationCache(":memory:")
+    cache.put_many([(-104.98, 39.74), (-118.24, 34.05)], [1600.0, 90.0])
+    index = SpatialElevationIndex.from_cache(cache, radius_m=30)
+    assert index.lookup([(-104.98, 39.74001), (-100.0, 40.0)]) == [1600.0, None]
+
+
+class CountingProvider(ElevationProvider):
+    def __init__(self):
+        self.points = 0
+
+    async def get_elevations(self, coordinates):
+        self.points += len(coordinates)
+        return [1000 + lat * 10 for lon, lat in coordinates]
+
+
+@pytest.mark.asyncio
+async def test_overlapping_route_fetches_only_its_new_segment():
+    corridor = np.column_stack((np.linspace(-105.0, -100.0, 50), np.linspace(39.7, 40.5, 50)))
+    # Starts inside the corridor at another vertex (so its densified points are not the same points),
+    # then leaves it
+    branch = np.vstack((corridor[10:40] + [0.0001, 0], [[-100.5, 41.5]]))
+    provider = CountingProvider()
+    cache = ElevationCache(":memory:")
+    index = SpatialElevationIndex(radius_m=30)
+
+    await fetch_elevations(densify(corridor).tolist(), cache=cache, provider=provider, spatial_index=index)
+    first = provider.points
+    branch_points = densify(branch).tolist()
+    elevations = await fetch_elevations(branch_points, cache=cache, provider=provider, spatial_index=index)
+
+    assert None not in elevations
+    shared = len(densify(branch[:-1]))
+    assert index.stats()["hits"] >= shared * 0.95
+    assert provider.points - first == len(branch_points) - index.stats()["hits"]
+    assert 0 < reuse_rate(cache, index) < 100
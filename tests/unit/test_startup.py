@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_importing_main_does_not_load_the_visualization_libraries():
+    code = "import sys, main; print(sorted({'folium', 'matplotlib'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    assert output.stdout.strip() == "[]"
+
+
+def test_no_viz_flag():
+    import main
+
+    assert main.parse_args(["--no-viz"]).no_viz
+    assert not main.parse_args([]).no_viz
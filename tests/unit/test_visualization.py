@@ -0,0 +1,18 @@
+import numpy as np
+
+from geometry import densify
+from visualization import visualize_routes
+
+
+def test_many_routes_on_one_simplified_map(tmp_path):
+    lon = np.linspace(-118.24, -104.98, 400)
+    routes = [densify(np.column_stack((lon, np.linspace(34.05, 39.74, 400) + offset + 0.05 * np.sin(lon * 7))))
+              for offset in (0, 0.5)]
+
+    full_path, simplified_path = tmp_path / "full.html", tmp_path / "simplified.html"
+    visualize_routes(routes, full_path, labels=["LA -> Denver", "LA -> Denver (north)"], tolerance_m=None)
+    visualize_routes(routes, simplified_path, labels=["LA -> Denver", "LA -> Denver (north)"])
+
+    html = simplified_path.read_text()
+    assert "Denver (north)" in html
+    assert simplified_path.stat().st_size < full_path.stat().st_size / 5
@@ -0,0 +1,62 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+from multiprocessing import shared_memory
+
+from elevation import ElevationProvider
+from fuel import calculate_fuel_profile
+from geometry import densify, segment_distances
+from main import quote_route
+from workers import RouteProcessPool, share_arrays, read_arrays
+
+ROUTE = [[-118.24, 34.05], [-117.9, 34.2], [-117.5, 34.21], [-117.0, 34.6], [-116.2, 35.0]]
+
+
+class TerrainProvider(ElevationProvider):
+    async def get_elevations(self, coordinates):
+        heights = [500 + 300 * np.sin(lon * 20) + 100 * np.cos(lat * 30) for lon, lat in coordinates]
+        heights[3] = None
+        return heights
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with RouteProcessPool(2) as pool:
+        yield pool
+
+
+def test_shared_arrays_round_trip():
+    first, second = np.arange(10, dtype=np.float64).reshape(5, 2), np.array([1.5, np.nan])
+    block, descriptor = share_arrays(first, second)
+    block.close()
+    copies = read_arrays(descriptor, unlink=True)
+    np.testing.assert_array_equal(copies[0], first)
+    np.testing.assert_array_equal(copies[1], second)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=descriptor[0])
+
+
+@pytest.mark.asyncio
+async def test_pool_matches_in_process_computation(pool):
+    detailed, distances = await pool.densify(np.array(ROUTE))
+    np.testing.assert_array_equal(detailed, densify(ROUTE))
+    np.testing.assert_allclose(distances, segment_distances(detailed))
+
+    elevations = await TerrainProvider().get_elevations(detailed.tolist())
+    total, segment_fuel = await pool.fuel_profile(elevations, distances, 5.75)
+    expected_total, expected_segment_fuel = calculate_fuel_profile(elevations, distances, 5.75)
+    assert total == pytest.approx(expected_total)
+    np.testing.assert_allclose(segment_fuel, expected_segment_fuel)
+
+
+@pytest.mark.asyncio
+async def test_quote_route_with_pool(pool):
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = await quote_route(ROUTE, provider=TerrainProvider())
+        quote = await quote_route(ROUTE, provider=TerrainProvider(), pool=pool)
+    assert quote["detailed_route"] == expected["detailed_route"]
+    assert quote["distance_miles"] == pytest.approx(expected["distance_miles"])
+    assert quote["fuel_consumption"] == pytest.approx(expected["fuel_consumption"])
+    assert quote["total_cost"] == expected["total_cost"]
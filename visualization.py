@@ -0,0 +1,57 @@
+# Optional output stages. folium and matplotlib are imported on first use only, so the quoting
+# pipeline (CLI, batch workers, the HTTP service, tests) starts without them.
+
+import numpy as np
+
+from geometry import route_to_array, simplify
+
+# Routes are simplified before drawing: 10 m is about one screen pixel at zoom level 14
+MAP_TOLERANCE_M = 10.0
+ROUTE_COLORS = ("blue", "red", "green", "purple", "orange", "darkred", "cadetblue", "darkgreen", "black", "pink")
+
+
+# Route visualization on the map
+def visualize_route(route, path="route_map.html", tolerance_m=MAP_TOLERANCE_M):
+    visualize_routes([route], path, tolerance_m=tolerance_m)
+
+
+# Many routes (e.g. all lanes of a batch run) on one map. Every route is simplified to
+# `tolerance_m` meters (None draws all points), `labels` are shown as tooltips.
+def visualize_routes(routes, path="route_map.html", labels=None, tolerance_m=MAP_TOLERANCE_M):
+    import folium
+
+    lines = [route_to_array(route) if tolerance_m is None else simplify(route, tolerance_m) for route in routes]
+    labels = labels or [f"Route {i + 1}" for i in range(len(lines))]
+
+    # Create a map centered on the first point of the first route
+    m = folium.Map(location=[lines[0][0][1], lines[0][0][0]], zoom_start=10)
+
+    for i, (line, label) in enumerate(zip(lines, labels)):
+        # Change the order of coordinates from (longitude, latitude) to (latitude, longitude)
+        color = ROUTE_COLORS[i % len(ROUTE_COLORS)]
+        folium.PolyLine(line[:, ::-1].tolist(), color=color, weight=2.5, opacity=1, tooltip=label).add_to(m)
+
+        # Add markers for the start and end of the route
+        folium.Marker([line[0][1], line[0][0]], tooltip=f"{label}: start", icon=folium.Icon(color="green")).add_to(m)
+        folium.Marker([line[-1][1], line[-1][0]], tooltip=f"{label}: end", icon=folium.Icon(color="red")).add_to(m)
+
+    if len(lines) > 1:
+        (min_lon, min_lat), (max_lon, max_lat) = np.vstack(lines).min(axis=0), np.vstack(lines).max(axis=0)
+        m.fit_bounds([[min_lat, min_lon], [max_lat, max_lon]])
+
+    # Save the map to a file
+    m.save(path)
+    print(f"Map saved to '{path}'")
+
+
+# Elevation graph from start to finish
+def plot_elevations(elevations):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    plt.plot(elevations, marker='o', linestyle=':', color='purple')  # Dotted line
+    plt.title('Elevation visualization from start to finish')
+    plt.xlabel(f'Number of points along the route\none point represents 0.1 mile*')
+    plt.ylabel('Elevation above sea level')
+    plt.grid()
+    plt.show()
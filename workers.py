@@ -0,0 +1,95 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from fuel import calculate_fuel_profile
+from geometry import densify, segment_distances
+
+
+# Copy float64 arrays into one new shared memory block. The other process gets the small
+# (block name, shapes) descriptor instead of the pickled data.
+def share_arrays(*arrays):
+    arrays = [np.ascontiguousarray(array, dtype=np.float64) for array in arrays]
+    block = shared_memory.SharedMemory(create=True, size=max(sum(array.nbytes for array in arrays), 1))
+    offset = 0
+    for array in arrays:
+        np.ndarray(array.shape, np.float64, block.buf, offset)[...] = array
+        offset += array.nbytes
+    return block, (block.name, [array.shape for array in arrays])
+
+
+# Copies of the arrays of a shared block (no view may outlive the block). With unlink=True the
+# block is removed afterwards: the reader of a result block is its owner.
+def read_arrays(descriptor, unlink=False):
+    name, shapes = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        arrays = []
+        offset = 0
+        for shape in shapes:
+            array = np.ndarray(shape, np.float64, block.buf, offset).copy()
+            arrays.append(array)
+            offset += array.nbytes
+    finally:
+        block.close()
+        if unlink:
+            block.unlink()
+    return arrays
+
+
+# Jobs run in the worker processes: arrays in and out go through shared memory
+
+def densify_job(descriptor, max_distance_per_point):
+    (route,) = read_arrays(descriptor)
+    detailed = densify(route, max_distance_per_point)
+    block, result = share_arrays(detailed, segment_distances(detailed))
+    block.close()
+    return result
+
+
+def fuel_job(descriptor, base_fuel_consumption):
+    elevations, distances = read_arrays(descriptor)
+    total, segment_fuel = calculate_fuel_profile(elevations, distances, base_fuel_consumption)
+    block, result = share_arrays(segment_fuel)
+    block.close()
+    return total, result
+
+
+# Pool of worker processes for the CPU-bound work of a quote (densification with segment distances,
+# the slope/fuel profile), so that many routes priced at once do not block the event loop doing the
+# network I/O. Workers are spawned (not forked from a process running an event loop and threads).
+class RouteProcessPool:
+    def __init__(self, processes=None):
+        self.executor = ProcessPoolExecutor(processes, mp_context=get_context("spawn"))
+
+    async def run(self, job, arrays, *args):
+        block, descriptor = share_arrays(*arrays)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, job, descriptor, *args)
+        finally:
+            block.close()
+            block.unlink()
+
+    # (densified (N, 2) route, distance in km of its N - 1 segments)
+    async def densify(self, route, max_distance_per_point=0.1):
+        result = await self.run(densify_job, [route], max_distance_per_point)
+        detailed, distances = read_arrays(result, unlink=True)
+        return detailed, distances
+
+    # Same result as fuel.calculate_fuel_profile, missing elevations may be None or NaN
+    async def fuel_profile(self, elevations, segment_distances_km, base_fuel_consumption):
+        heights = np.array(elevations, dtype=np.float64)  # None becomes NaN
+        total, result = await self.run(fuel_job, [heights, segment_distances_km], base_fuel_consumption)
+        (segment_fuel,) = read_arrays(result, unlink=True)
+        return total, segment_fuel
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()